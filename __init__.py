@@ -28,45 +28,66 @@ is_installed("moviepy")
 
 from .image_fitting_node import ImageSquareAdapterNode
 from .image_fit_resize_node import ImageResizeAndCropNode
-from .resolution import AspectRatioMobileDevices, AdjustAndRoundDimensions, PopularScreenResolutions
+from .resolution import AspectRatioMobileDevices, AdjustAndRoundDimensions, PopularScreenResolutions, MultiStageUpscalePlanner
 from .load_images_node import LoadImagesFromFolder
 from .number_range_node import NumberRangeNode
-from .slider_comparison_node import SliderComparisonNode
+from .slider_comparison_node import SliderComparisonNode, SliderComparisonFramesNode, MultiSliderComparisonNode, VideoEncodeWaitNode
 from .auto_levels_node import AutoLevelsNode
 from .math_operation_node import MathOperationNode
 
 from .image_patch_nodes import ImageExtractRect, ImageCombineRect
+from .image_precision_node import ImageConvertPrecision
+from .image_atlas_nodes import ImagePackAtlas, ImageUnpackAtlas
+from .instrumentation import instrument_nodes
+from .memoize import memoize_nodes
 
 NODE_CLASS_MAPPINGS = {
     "ImageSquareAdapterNode": ImageSquareAdapterNode,
     "ImageResizeAndCropNode": ImageResizeAndCropNode,
     "AdjustAndRoundDimensions": AdjustAndRoundDimensions,
+    "MultiStageUpscalePlanner": MultiStageUpscalePlanner,
     "AspectRatioMobileDevices": AspectRatioMobileDevices,
     "PopularScreenResolutions" : PopularScreenResolutions,
     "LoadImagesFromFolder": LoadImagesFromFolder,
     "NumberRangeNode": NumberRangeNode,
     "SliderComparisonNode": SliderComparisonNode,
+    "SliderComparisonFramesNode": SliderComparisonFramesNode,
+    "MultiSliderComparisonNode": MultiSliderComparisonNode,
+    "VideoEncodeWaitNode": VideoEncodeWaitNode,
     "AutoLevelsNode": AutoLevelsNode,
     "MathOperationNode": MathOperationNode,
     "ImageExtractRect": ImageExtractRect,
-    "ImageCombineRect": ImageCombineRect
+    "ImageCombineRect": ImageCombineRect,
+    "ImageConvertPrecision": ImageConvertPrecision,
+    "ImagePackAtlas": ImagePackAtlas,
+    "ImageUnpackAtlas": ImageUnpackAtlas
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "ImageSquareAdapterNode": "Image Square Adapter Node",
     "ImageResizeAndCropNode": "Image Resize And Crop Node",
     "AdjustAndRoundDimensions" : "Resolution for 2-Stage Upscale with crop",
+    "MultiStageUpscalePlanner": "Multi-Stage Upscale Planner",
     "AspectRatioMobileDevices" : "Aspect Ratio Mobile Devices",
     "PopularScreenResolutions": "Aspect Ratio Popular",
     "LoadImagesFromFolder": "Load Images From Folder",
     "NumberRangeNode": "Number Range",
     "SliderComparisonNode": "Slider Comparison (Video)",
+    "SliderComparisonFramesNode": "Slider Comparison (Frames)",
+    "MultiSliderComparisonNode": "Multi Slider Comparison (Video)",
+    "VideoEncodeWaitNode": "Wait For Video",
     "AutoLevelsNode": "Auto Levels (Image)",
     "MathOperationNode": "Math Operation (Min/Max)",
     "ImageExtractRect": "Image Extract Rect",
-    "ImageCombineRect": "Image Combine Rect"
+    "ImageCombineRect": "Image Combine Rect",
+    "ImageConvertPrecision": "Image Convert Precision",
+    "ImagePackAtlas": "Image Pack Atlas",
+    "ImageUnpackAtlas": "Image Unpack Atlas"
 }
 
+memoize_nodes(NODE_CLASS_MAPPINGS)
+instrument_nodes(NODE_CLASS_MAPPINGS)
+
 __all__ = NODE_CLASS_MAPPINGS
 
 print('\033[34mNimbus Nodes: \033[92mLoaded\033[0m')
@@ -1,5 +1,6 @@
 import torch
-import numpy as np
+
+from .utils import percentile, resolve_precision, to_float, process_in_chunks, PRECISION_INPUT
 
 class AutoLevelsNode:
     def __init__(self):
@@ -14,6 +15,9 @@ class AutoLevelsNode:
                 "white_point": ("FLOAT", {"default": 99.0, "min": 51.0, "max": 100.0, "step": 0.1, "display": "number", "tooltip": "Percentage of brightest pixels to clip to white"}),
                 "channel_independent": ("BOOLEAN", {"default": True, "label_on": "Channel Independent (Auto Levels)", "label_off": "Global (Auto Contrast)", "tooltip": "Calculate levels per channel (rebalances color) or globally (maintains color balance)"}),
             },
+            "optional": {
+                "precision": PRECISION_INPUT,
+            },
         }
 
     RETURN_TYPES = ("IMAGE",)
@@ -21,55 +25,39 @@ class AutoLevelsNode:
 
     CATEGORY = "Nimbus-Pack/Image Enhancement"
 
-    def apply_auto_levels(self, image, black_point, white_point, channel_independent):
-        # image is [B, H, W, C] tensor in range [0, 1]
-        
-        # Convert to numpy for easier percentile handling
-        img_np = image.cpu().numpy()
-        
-        # Prepare output array
-        out_np = np.empty_like(img_np)
-        
-        # Process each image in batch independently
-        for i in range(img_np.shape[0]):
-            img = img_np[i] # [H, W, C]
-            
+    def apply_auto_levels(self, image, black_point, white_point, channel_independent, precision="auto"):
+        # image is [B, H, W, C] tensor in range [0, 1] (or [0, 255] for uint8)
+        # Everything stays on the input's device, percentiles included (CPU tensors use
+        # numpy on the tensor's own memory).
+        precision = resolve_precision(precision, image)
+        batch, height, width, channels = image.shape
+
+        def levels_chunk(chunk):
+            # Each image in the chunk is processed independently, in float32
+            img = to_float(chunk) # [n, H, W, C]
+            n = img.shape[0]
+
             if channel_independent:
-                # Apply per channel
-                for c in range(img.shape[2]):
-                    channel_data = img[:, :, c]
-                    
-                    # Calculate percentiles
-                    # black_point is e.g. 1.0 -> 1st percentile
-                    # white_point is e.g. 99.0 -> 99th percentile
-                    p_low, p_high = np.percentile(channel_data, (black_point, white_point))
-                    
-                    # Avoid division by zero
-                    if p_high > p_low:
-                        # Stretch contrast
-                        # Formula: (x - min) * (new_max - new_min) / (max - min) + new_min
-                        # We map [p_low, p_high] to [0.0, 1.0]
-                        channel_data = (channel_data - p_low) / (p_high - p_low)
-                    else:
-                        # If image is flat color, centering it might be weird, but let's just 
-                        # clamp it or leave it. If max == min, we can't stretch.
-                        # Usually we can just shift it to 0 or leave it. 
-                        # Let's subtract min and clip.
-                        channel_data = channel_data - p_low
-                    
-                    out_np[i, :, :, c] = channel_data
+                # Percentiles per image and channel, shape [n, 1, 1, C]
+                # black_point is e.g. 1.0 -> 1st percentile
+                # white_point is e.g. 99.0 -> 99th percentile
+                p_low, p_high = percentile(img.reshape(n, -1, channels), (black_point, white_point), dim=1)
+                p_low, p_high = p_low.view(n, 1, 1, channels), p_high.view(n, 1, 1, channels)
             else:
-                # Global calculation across all channels for this image
-                p_low, p_high = np.percentile(img, (black_point, white_point))
-                
-                if p_high > p_low:
-                    out_np[i] = (img - p_low) / (p_high - p_low)
-                else:
-                    out_np[i] = img - p_low
+                # Global calculation across all channels for each image, shape [n, 1, 1, 1]
+                p_low, p_high = percentile(img.reshape(n, -1), (black_point, white_point), dim=1)
+                p_low, p_high = p_low.view(n, 1, 1, 1), p_high.view(n, 1, 1, 1)
+
+            # Stretch [p_low, p_high] to [0.0, 1.0]
+            # Formula: (x - min) * (new_max - new_min) / (max - min) + new_min
+            # If a channel is flat (max == min) we can't stretch, just subtract min.
+            spread = p_high - p_low
+            scale = torch.where(spread > 0, 1.0 / spread.clamp(min=torch.finfo(spread.dtype).tiny), torch.ones_like(spread))
+
+            # Clip final result to ensure we stay in valid range, outliers outside
+            # the percentiles will be <0 or >1
+            return (img - p_low).mul_(scale).clamp_(0.0, 1.0)
 
-        # Clip final result to ensure we stay in valid range, though we mapped to 0-1 theoretically, 
-        # outliers outside the percentiles will be <0 or >1
-        out_np = np.clip(out_np, 0.0, 1.0)
-        
-        # Convert back to tensor
-        return (torch.from_numpy(out_np),)
+        # Float copy, the partition/sort workspace of the percentiles and the result
+        frame_bytes = 4 * 4 * height * width * channels
+        return (process_in_chunks(image, image.shape, precision, levels_chunk, frame_bytes),)
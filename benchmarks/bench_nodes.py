@@ -0,0 +1,381 @@
+"""
+CPU benchmark suite for the Nimbus Pack nodes.
+
+Runs without ComfyUI or a GPU: the ``folder_paths`` stand-in next to this script
+replaces ComfyUI's module and the pack is imported as a plain package from the
+repository root (without running its ``__init__``). Every case runs in a fresh
+process so peak memory is measured in isolation.
+
+    python benchmarks/bench_nodes.py                  # run and compare with baselines.json
+    python benchmarks/bench_nodes.py --quick          # smaller matrix
+    python benchmarks/bench_nodes.py --filter resize  # only cases whose name contains "resize"
+    python benchmarks/bench_nodes.py --save-baseline  # record the results as the new baselines
+"""
+import argparse
+import atexit
+import gc
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+PACKAGE = "nimbus_pack"
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baselines.json")
+
+BATCH_SIZES = (1, 8)
+RESOLUTIONS = ((512, 512), (1920, 1080), (3840, 2160))
+QUICK_BATCH_SIZES = (1, 4)
+QUICK_RESOLUTIONS = ((512, 512), (1920, 1080))
+THREAD_COUNTS = (1, 2, 4, 8)
+
+# Timing differences below this are treated as noise when comparing against baselines
+TIME_NOISE_FLOOR_S = 0.005
+
+
+def import_pack():
+    """Register the repository root as the ``nimbus_pack`` package without executing its ``__init__``."""
+    if BENCH_DIR not in sys.path:
+        sys.path.insert(0, BENCH_DIR)
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [REPO_ROOT]
+        sys.modules[PACKAGE] = package
+    return sys.modules[PACKAGE]
+
+
+def load_node(module_name, class_name):
+    import_pack()
+    module = importlib.import_module(f"{PACKAGE}.{module_name}")
+    return getattr(module, class_name)
+
+
+def set_threads(threads):
+    """Configure the pack's worker pool for this (child) process."""
+    if threads is not None:
+        os.environ["NIMBUS_THREADS"] = str(threads)
+
+
+def random_images(batch, width, height, channels=3, seed=0):
+    import torch
+    generator = torch.Generator().manual_seed(seed)
+    return torch.rand((batch, height, width, channels), generator=generator, dtype=torch.float32)
+
+
+# ---------------------------------------------------------------------------
+# Cases
+#
+# A case is (name, setup, kwargs). ``setup(**kwargs)`` runs in the child process,
+# builds the inputs and returns a zero-argument callable that is timed. It may
+# instead return (callable, metrics) where metrics() returns extra values to report.
+# ---------------------------------------------------------------------------
+
+def setup_resize_and_crop(batch, width, height, resampling, supersample, threads=None, target=(1024, 1024)):
+    set_threads(threads)
+    node = load_node("image_fit_resize_node", "ImageResizeAndCropNode")()
+    image = random_images(batch, width, height)
+    return lambda: node.image_resize_and_crop(image, target[0], target[1], "center", resampling, supersample)
+
+
+def setup_square_adapter(batch, width, height, resampling, fitting_mode, threads=None):
+    set_threads(threads)
+    node = load_node("image_fitting_node", "ImageSquareAdapterNode")()
+    image = random_images(batch, width, height)
+    return lambda: node.image_fit_in_square(image, 1024, "255,255,255", resampling, "false", fitting_mode)
+
+
+def setup_auto_levels(batch, width, height, channel_independent):
+    node = load_node("auto_levels_node", "AutoLevelsNode")()
+    image = random_images(batch, width, height)
+    return lambda: node.apply_auto_levels(image, 1.0, 99.0, channel_independent)
+
+
+def setup_load_images(batch, width, height, bit_depth):
+    import numpy as np
+    from PIL import Image
+
+    node = load_node("load_images_node", "LoadImagesFromFolder")()
+    folder = tempfile.mkdtemp(prefix="nimbus_bench_images_")
+    atexit.register(shutil.rmtree, folder, True)
+    rng = np.random.default_rng(0)
+    for i in range(batch):
+        if bit_depth == 16:
+            data = rng.integers(0, 65535, size=(height, width), dtype=np.uint16)
+            img = Image.fromarray(data, mode="I;16")
+        else:
+            data = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+            img = Image.fromarray(data, mode="RGB")
+        img.save(os.path.join(folder, f"frame_{i:05d}.png"), compress_level=1)
+    return lambda: node.load_images(folder)
+
+
+def setup_extract_rect(batch, width, height, corner):
+    node = load_node("image_patch_nodes", "ImageExtractRect")()
+    image = random_images(batch, width, height)
+    return lambda: node.extract_rect(image, 256, 256, corner)
+
+
+def setup_combine_rect(batch, width, height, corner):
+    node = load_node("image_patch_nodes", "ImageCombineRect")()
+    destination = random_images(batch, width, height)
+    source = random_images(1, 256, 256, seed=1)
+    return lambda: node.combine_rect(destination, source, corner)
+
+
+def setup_slider_comparison(batch, width, height, video_duration, frame_rate, target_height):
+    import folder_paths
+
+    output_dir = tempfile.mkdtemp(prefix="nimbus_bench_video_")
+    atexit.register(shutil.rmtree, output_dir, True)
+    folder_paths.set_output_directory(output_dir)
+    node = load_node("slider_comparison_node", "SliderComparisonNode")()
+    before = random_images(batch, width, height)
+    after = random_images(batch, width, height, seed=1)
+    return lambda: node.create_comparison_video(before, after, video_duration, frame_rate, "255,0,0", 5, target_height)
+
+
+def smooth_image(width, height, seed=0):
+    """Band-limited test pattern, so resampling quality differences are measurable."""
+    import numpy as np
+    from PIL import Image
+
+    phase = np.random.default_rng(seed).uniform(0, 6, size=3)
+    x = np.linspace(0, 40, width)[None, :, None]
+    y = np.linspace(0, 25, height)[:, None, None]
+    return Image.fromarray((127.5 + 120 * np.sin(x * np.array([1.0, 1.3, 1.7]) + y + phase)).astype(np.uint8))
+
+
+def setup_slider_prepare(batch, width, height, target_height, fused):
+    import numpy as np
+    from PIL import Image
+
+    slider_render = importlib.import_module(f"{import_pack().__name__}.slider_render")
+    before = smooth_image(width, height)
+    after = smooth_image(3840, 2160, seed=1)
+
+    if fused:
+        def run():
+            return slider_render.prepare_comparison_arrays(before, after, target_height)
+    else:
+        # Previous path: fit onto after's canvas, then scale both to the target height
+        def run():
+            fitted = slider_render.resize_and_center_image(before, after)
+            return (np.array(slider_render.resize_image_to_height(fitted, target_height)),
+                    np.array(slider_render.resize_image_to_height(after, target_height)))
+
+    def metrics():
+        # PSNR of "before" against a single float-domain lanczos resample of the source
+        canvas_size, fitted_size, (left, top) = slider_render.comparison_geometry(before.size, after.size, target_height)
+        source = np.asarray(before, dtype=np.float32)
+        reference = np.stack([np.asarray(Image.fromarray(source[..., c]).resize(fitted_size, Image.LANCZOS))
+                              for c in range(3)], axis=-1)
+        result = run()[0][top:top + fitted_size[1], left:left + fitted_size[0]].astype(np.float64)
+        mse = np.mean((result - np.clip(reference, 0, 255)) ** 2)
+        return {"psnr_db": float(10 * np.log10(255 ** 2 / max(mse, 1e-12)))}
+
+    return run, metrics
+
+
+def build_cases(quick=False):
+    batch_sizes = QUICK_BATCH_SIZES if quick else BATCH_SIZES
+    resolutions = QUICK_RESOLUTIONS if quick else RESOLUTIONS
+    cases = []
+
+    for batch in batch_sizes:
+        for width, height in resolutions:
+            size = f"b{batch}_{width}x{height}"
+            for resampling in ("lanczos", "bilinear"):
+                cases.append((f"resize_and_crop_{resampling}_{size}", setup_resize_and_crop,
+                              dict(batch=batch, width=width, height=height, resampling=resampling, supersample="false")))
+            for fitting_mode in ("none", "center"):
+                cases.append((f"square_adapter_{fitting_mode}_{size}", setup_square_adapter,
+                              dict(batch=batch, width=width, height=height, resampling="lanczos", fitting_mode=fitting_mode)))
+            for channel_independent in (True, False):
+                mode = "channel" if channel_independent else "global"
+                cases.append((f"auto_levels_{mode}_{size}", setup_auto_levels,
+                              dict(batch=batch, width=width, height=height, channel_independent=channel_independent)))
+            for bit_depth in (8, 16):
+                cases.append((f"load_images_{bit_depth}bit_{size}", setup_load_images,
+                              dict(batch=batch, width=width, height=height, bit_depth=bit_depth)))
+            cases.append((f"extract_rect_{size}", setup_extract_rect,
+                          dict(batch=batch, width=width, height=height, corner="bottom-right")))
+            cases.append((f"combine_rect_{size}", setup_combine_rect,
+                          dict(batch=batch, width=width, height=height, corner="bottom-right")))
+
+    # Supersampling multiplies the intermediate by 64, keep it to the small sizes
+    for batch in batch_sizes:
+        cases.append((f"resize_and_crop_supersample_b{batch}_512x512", setup_resize_and_crop,
+                      dict(batch=batch, width=512, height=512, resampling="lanczos", supersample="true")))
+
+    # Extreme aspect ratios cropped to the 1024x1024 square, where most of the resized
+    # frame falls outside the crop
+    for width, height in ((8192, 1024), (1024, 8192), (16384, 2048)):
+        for resampling in ("lanczos", "bilinear"):
+            cases.append((f"resize_and_crop_aspect_{resampling}_b4_{width}x{height}", setup_resize_and_crop,
+                          dict(batch=4, width=width, height=height, resampling=resampling, supersample="false")))
+    cases.append(("resize_and_crop_aspect_supersample_b1_4096x512", setup_resize_and_crop,
+                  dict(batch=1, width=4096, height=512, resampling="lanczos", supersample="true")))
+    # Sizes without a large common divisor with their resized size
+    for (width, height), (target_width, target_height) in (((7000, 1500), (1024, 1024)), ((4000, 3000), (1024, 1024)),
+                                                           ((1921, 1080), (768, 512)), ((1920, 1080), (768, 512))):
+        for resampling in ("lanczos", "bicubic"):
+            cases.append((f"resize_and_crop_aspect_{resampling}_b4_{width}x{height}_to_{target_width}x{target_height}",
+                          setup_resize_and_crop,
+                          dict(batch=4, width=width, height=height, resampling=resampling, supersample="false",
+                               target=(target_width, target_height))))
+
+    # Scaling of the per-frame PIL paths over the worker pool size
+    for threads in THREAD_COUNTS:
+        cases.append((f"thread_scaling_resize_and_crop_lanczos_b16_1920x1080_t{threads}", setup_resize_and_crop,
+                      dict(batch=16, width=1920, height=1080, resampling="lanczos", supersample="false", threads=threads)))
+        cases.append((f"thread_scaling_square_adapter_lanczos_b16_1920x1080_t{threads}", setup_square_adapter,
+                      dict(batch=16, width=1920, height=1080, resampling="lanczos", fitting_mode="none", threads=threads)))
+
+    # Slider input geometry: two lanczos passes (previous path) against one fused pass
+    for width, height in ((4000, 3000), (7680, 4320)):
+        for fused in (False, True):
+            path = "fused" if fused else "two_pass"
+            cases.append((f"slider_prepare_{path}_{width}x{height}_h1080", setup_slider_prepare,
+                          dict(batch=1, width=width, height=height, target_height=1080, fused=fused)))
+
+    for width, height in resolutions:
+        for target_height in (720, 1080):
+            cases.append((f"slider_comparison_{width}x{height}_h{target_height}", setup_slider_comparison,
+                          dict(batch=1, width=width, height=height, video_duration=2.0, frame_rate=30,
+                               target_height=target_height)))
+
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _run_case(setup, kwargs, repeat, queue):
+    try:
+        run = setup(**kwargs)
+        metrics = None
+        if isinstance(run, tuple):
+            run, metrics = run
+        RssSampler = importlib.import_module(f"{import_pack().__name__}.instrumentation").RssSampler
+        run()  # warm-up, also triggers lazy imports
+        timings = []
+        peaks = []
+        for _ in range(repeat):
+            gc.collect()
+            # The process high-water mark is already set by the warm-up, so sample the
+            # current RSS during each timed run instead
+            with RssSampler() as sampler:
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            peaks.append(sampler.peak_delta_bytes)
+        peak_mb = None if None in peaks else max(peaks) / (1024 * 1024)
+        result = {"time_s": statistics.median(timings), "min_time_s": min(timings), "peak_mb": peak_mb}
+        if metrics is not None:
+            result.update(metrics())
+        queue.put(result)
+    except ImportError as e:
+        queue.put({"skipped": f"missing dependency: {e}"})
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_case(setup, kwargs, repeat):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_case, args=(setup, kwargs, repeat, queue))
+    process.start()
+    process.join()
+    if queue.empty():
+        return {"error": f"benchmark process exited with code {process.exitcode}"}
+    return queue.get()
+
+
+def compare(name, result, baseline, time_threshold, memory_threshold):
+    """Return a list of regression messages for one case."""
+    regressions = []
+    reference = baseline.get(name)
+    if not reference or "time_s" not in result:
+        return regressions
+
+    if reference.get("time_s") and result["time_s"] > max(reference["time_s"] * (1 + time_threshold),
+                                                          reference["time_s"] + TIME_NOISE_FLOOR_S):
+        regressions.append(f"time {result['time_s']:.3f}s > baseline {reference['time_s']:.3f}s "
+                           f"(+{100 * (result['time_s'] / reference['time_s'] - 1):.0f}%)")
+
+    # Small absolute deltas are dominated by allocator noise
+    if reference.get("peak_mb") is not None and result.get("peak_mb") is not None:
+        limit = max(reference["peak_mb"] * (1 + memory_threshold), reference["peak_mb"] + 8)
+        if result["peak_mb"] > limit:
+            regressions.append(f"peak {result['peak_mb']:.1f}MB > baseline {reference['peak_mb']:.1f}MB")
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Nimbus Pack nodes on CPU.")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this substring")
+    parser.add_argument("--quick", action="store_true", help="Use a smaller batch/resolution matrix")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (median is reported)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--time-threshold", type=float, default=0.15, help="Allowed relative slowdown (0.15 = 15%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="Allowed relative peak memory growth")
+    parser.add_argument("--output", help="Write the raw results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    cases = [case for case in build_cases(args.quick) if args.filter in case[0]]
+    results = {}
+    regressions = {}
+
+    for name, setup, kwargs in cases:
+        result = run_case(setup, kwargs, args.repeat)
+        results[name] = result
+
+        if "time_s" in result:
+            peak = f"{result['peak_mb']:8.1f}MB" if result["peak_mb"] is not None else "     n/a"
+            line = f"{name:<55} {result['time_s']:9.4f}s {peak}"
+            if "psnr_db" in result:
+                line += f" {result['psnr_db']:6.1f}dB"
+        else:
+            line = f"{name:<55} {result.get('skipped') or result.get('error')}"
+
+        case_regressions = compare(name, result, baseline, args.time_threshold, args.memory_threshold)
+        if case_regressions:
+            regressions[name] = case_regressions
+            line += "  REGRESSION: " + "; ".join(case_regressions)
+        print(line, flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        # Skipped and failed cases have no timing and keep their previous baseline
+        measured = {name: result for name, result in results.items() if "time_s" in result}
+        baseline.update(measured)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved {len(measured)} baselines to {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed against {args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+"""
+Minimal stand-in for ComfyUI's ``folder_paths`` module so the nodes can be
+imported and benchmarked outside of ComfyUI.
+"""
+import os
+import tempfile
+
+_output_directory = os.environ.get("NIMBUS_BENCH_OUTPUT") or os.path.join(tempfile.gettempdir(), "nimbus_bench_output")
+_temp_directory = os.path.join(_output_directory, "temp")
+
+
+def get_output_directory():
+    os.makedirs(_output_directory, exist_ok=True)
+    return _output_directory
+
+
+def get_temp_directory():
+    os.makedirs(_temp_directory, exist_ok=True)
+    return _temp_directory
+
+
+def set_output_directory(path):
+    global _output_directory
+    _output_directory = path
@@ -0,0 +1,183 @@
+"""
+Bounded background queue for video encodes.
+
+Nodes hand a render callable to ``submit`` and return the final path right away. The
+callable writes to a temporary ``*.partial.mp4`` next to the target, which is renamed
+onto the final path once complete, so the final file only ever appears fully written.
+A failed encode leaves ``<path>.error`` with the message instead. Jobs are only tracked
+in memory while queued or running, finished ones are known from these files.
+
+``NIMBUS_ENCODE_WORKERS`` sets the number of concurrent encodes (default 1) and
+``NIMBUS_ENCODE_QUEUE`` the number of encodes queued or running before ``submit``
+blocks (default 4).
+
+Wait for an encode from another process with:
+
+    python encode_queue.py /path/to/video.mp4 --timeout 600
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+UNKNOWN = "unknown"
+
+# Optional node input that hands the encode to this queue
+ASYNC_ENCODE_INPUT = ("BOOLEAN", {"default": False, "tooltip": "Encode in the background and return the path immediately. Use Wait For Video to block on it"})
+
+
+def _env_int(name, default):
+    try:
+        return max(1, int(os.environ[name]))
+    except (KeyError, ValueError):
+        return default
+
+
+_executor = None
+_slots = None
+_jobs = {}
+_lock = threading.Lock()
+
+
+class EncodeJob:
+    def __init__(self, path):
+        self.path = path
+        self.status = QUEUED
+        self.error = None
+        self.future = None
+
+
+def partial_path(path):
+    """Temporary path for an encode in progress. Keeps the extension so the muxer is inferred."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.partial{ext}"
+
+
+def error_path(path):
+    return path + ".error"
+
+
+def write_atomically(path, render):
+    """Run render(temp_path) and rename the result onto path. Cleans up on failure."""
+    temp_path = partial_path(path)
+    try:
+        render(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_env_int("NIMBUS_ENCODE_WORKERS", 1), thread_name_prefix="nimbus-encode")
+            _slots = threading.BoundedSemaphore(_env_int("NIMBUS_ENCODE_QUEUE", 4))
+        return _executor, _slots
+
+
+def submit(path, render):
+    """
+    Queue render(temp_path) in the background and return its job. Blocks while the
+    queue is full so pending frame data stays bounded.
+    """
+    executor, slots = _get_executor()
+    slots.acquire()
+
+    job = EncodeJob(path)
+
+    def run():
+        job.status = RUNNING
+        try:
+            write_atomically(path, render)
+            job.status = DONE
+        except Exception as e:
+            job.status = FAILED
+            job.error = f"{type(e).__name__}: {e}"
+            print(f"Nimbus encode failed for {path}:\n{traceback.format_exc()}")
+            with open(error_path(path), "w") as f:
+                f.write(job.error + "\n")
+        finally:
+            _forget(job)
+            slots.release()
+
+    # Registered before it can run, so a job never finishes before it is tracked
+    with _lock:
+        _jobs[path] = job
+    try:
+        job.future = executor.submit(run)
+    except BaseException:
+        _forget(job)
+        slots.release()
+        raise
+    return job
+
+
+def _forget(job):
+    # The result is on disk (the video or its .error file), job_status reads it from there
+    with _lock:
+        if _jobs.get(job.path) is job:
+            del _jobs[job.path]
+
+
+def job_status(path):
+    """Status of the encode for path. Works for files from other processes via the file system."""
+    with _lock:
+        job = _jobs.get(path)
+    if job is not None:
+        return job.status
+    if os.path.exists(path):
+        return DONE
+    if os.path.exists(error_path(path)):
+        return FAILED
+    if os.path.exists(partial_path(path)):
+        return RUNNING
+    return UNKNOWN
+
+
+def wait_for(path, timeout=None, poll_interval=0.5):
+    """
+    Block until the encode for path has finished and return its status. Returns the
+    current status if the timeout (seconds, None for no limit) expires first.
+    """
+    with _lock:
+        job = _jobs.get(path)
+    if job is not None and job.future is not None:
+        try:
+            job.future.result(timeout=timeout)
+        except Exception:
+            pass
+        return job.status
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = job_status(path)
+        if status in (DONE, FAILED):
+            return status
+        if deadline is not None and time.monotonic() >= deadline:
+            return status
+        time.sleep(poll_interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wait for a background video encode to finish.")
+    parser.add_argument("path", help="Final video path returned by the node")
+    parser.add_argument("--timeout", type=float, default=None, help="Give up after this many seconds")
+    args = parser.parse_args(argv)
+
+    status = wait_for(os.path.abspath(args.path), args.timeout)
+    print(status)
+    return 0 if status == DONE else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
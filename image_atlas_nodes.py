@@ -0,0 +1,133 @@
+import torch
+
+from .utils import image_precision, to_precision, to_rgb
+
+
+def pack_shelves(sizes, atlas_width, atlas_height, padding=0):
+    """
+    Shelf packing (first fit, decreasing height) of (width, height) rectangles into as
+    many atlases as needed. Returns one (atlas_index, x, y) per rectangle, in input order.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0], i))
+    placements = [None] * len(sizes)
+    # Per atlas: list of shelves [y, height, next_x] and the y where the next shelf starts
+    atlases = []
+
+    for i in order:
+        width, height = sizes[i][0] + padding, sizes[i][1] + padding
+        if sizes[i][0] > atlas_width or sizes[i][1] > atlas_height:
+            raise ValueError(f"Image {i} ({sizes[i][0]}x{sizes[i][1]}) does not fit into a {atlas_width}x{atlas_height} atlas")
+
+        placed = False
+        for atlas_index, atlas in enumerate(atlases):
+            for shelf in atlas["shelves"]:
+                if height <= shelf[1] and shelf[2] + sizes[i][0] <= atlas_width:
+                    placements[i] = (atlas_index, shelf[2], shelf[0])
+                    shelf[2] += width
+                    placed = True
+                    break
+            if placed:
+                break
+            # Open a new shelf below the existing ones
+            if atlas["next_y"] + sizes[i][1] <= atlas_height:
+                shelf = [atlas["next_y"], height, width]
+                atlas["shelves"].append(shelf)
+                atlas["next_y"] += height
+                placements[i] = (atlas_index, 0, shelf[0])
+                placed = True
+                break
+
+        if not placed:
+            atlases.append({"shelves": [[0, height, width]], "next_y": height})
+            placements[i] = (len(atlases) - 1, 0, 0)
+
+    return placements, len(atlases)
+
+
+class ImagePackAtlas:
+    """
+    Packs a list of differently sized images into fixed-size atlas tensors, so pointwise
+    operations (a fixed color grade, gamma, ...) run as a few large batched calls. Nodes
+    that use image statistics, such as Auto Levels, would mix the images of an atlas.
+    Use Image Unpack Atlas with the layout to get the individual images back.
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "atlas_width": ("INT", {"default": 2048, "min": 64, "max": 16384, "step": 1}),
+                "atlas_height": ("INT", {"default": 2048, "min": 64, "max": 16384, "step": 1}),
+                "padding": ("INT", {"default": 0, "min": 0, "max": 256, "step": 1, "tooltip": "Gap between packed images, avoids bleeding for filters with a footprint"}),
+            }
+        }
+
+    INPUT_IS_LIST = True
+    RETURN_TYPES = ("IMAGE", "ATLAS_LAYOUT")
+    RETURN_NAMES = ("atlas", "layout")
+    FUNCTION = "pack_atlas"
+    CATEGORY = "Nimbus-Pack/Image"
+
+    def pack_atlas(self, images, atlas_width, atlas_height, padding):
+        atlas_width, atlas_height, padding = atlas_width[0], atlas_height[0], padding[0]
+
+        # Flatten the list of [B, H, W, C] batches into single frames
+        frames = [image[i:i + 1] for image in images for i in range(image.shape[0])]
+        if not frames:
+            raise ValueError("No images to pack")
+
+        # Mixed channel counts are packed as RGB, mixed precisions as the first image's
+        if len({frame.shape[-1] for frame in frames}) > 1:
+            frames = [to_rgb(frame) for frame in frames]
+        precision = image_precision(frames[0])
+        channels = frames[0].shape[-1]
+
+        sizes = [(frame.shape[2], frame.shape[1]) for frame in frames]
+        placements, atlas_count = pack_shelves(sizes, atlas_width, atlas_height, padding)
+
+        atlas = torch.zeros((atlas_count, atlas_height, atlas_width, channels), dtype=frames[0].dtype, device=frames[0].device)
+        layout = {"atlas_width": atlas_width, "atlas_height": atlas_height, "placements": []}
+
+        for frame, (width, height), (index, x, y) in zip(frames, sizes, placements):
+            atlas[index:index + 1, y:y + height, x:x + width, :] = to_precision(frame, precision).to(atlas.device)
+            layout["placements"].append({"atlas": index, "x": x, "y": y, "width": width, "height": height})
+
+        return (atlas, layout)
+
+
+class ImageUnpackAtlas:
+    """
+    Cuts the images back out of atlases built by Image Pack Atlas. If the atlases were
+    scaled in between (e.g. by an upscaler), the placements are scaled with them.
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "atlas": ("IMAGE",),
+                "layout": ("ATLAS_LAYOUT",),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("images",)
+    OUTPUT_IS_LIST = (True,)
+    FUNCTION = "unpack_atlas"
+    CATEGORY = "Nimbus-Pack/Image"
+
+    def unpack_atlas(self, atlas, layout):
+        # atlas is [N, H, W, C]
+        scale_x = atlas.shape[2] / layout["atlas_width"]
+        scale_y = atlas.shape[1] / layout["atlas_height"]
+
+        images = []
+        for placement in layout["placements"]:
+            x, y = round(placement["x"] * scale_x), round(placement["y"] * scale_y)
+            width = max(1, round(placement["width"] * scale_x))
+            height = max(1, round(placement["height"] * scale_y))
+            index = placement["atlas"]
+            images.append(atlas[index:index + 1, y:y + height, x:x + width, :])
+
+        return (images,)
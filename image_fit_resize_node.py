@@ -2,8 +2,12 @@ from PIL import Image
 import torch
 import numpy as np
 
-# Assuming pil2tensor and tensor2pil are utility functions provided in your environment
-from .utils import pil2tensor, tensor2pil
+from .utils import (pil2tensor, tensor2pil, resize_tensor, resample_span, resample_on_device, resolve_precision,
+                    process_in_chunks, map_ordered, RESAMPLE_FILTERS, PRECISION_INPUT)
+from .instrumentation import phase
+
+# Resized pixels kept around the crop when supersampling, covers the downscale filter
+SUPERSAMPLE_BORDER = 3
 
 
 class ImageResizeAndCropNode:
@@ -23,6 +27,9 @@ class ImageResizeAndCropNode:
                 "alignment": (["center", "left-top", "left-center", "left-bottom", "center-top", "center-center", "center-bottom", "right-top", "right-center", "right-bottom"], {"default": "center"}),
                 "resampling": (["lanczos", "nearest", "bilinear", "bicubic"], {"default": "lanczos"}),
                 "supersample": (["true", "false"], {"default": "false"}),
+            },
+            "optional": {
+                "precision": PRECISION_INPUT,
             }
         }
 
@@ -32,27 +39,45 @@ class ImageResizeAndCropNode:
     CATEGORY = "Nimbus-Pack/Image"
 
     def image_resize_and_crop(self, image, width=224, height=224, alignment='center', resampling='lanczos',
-                              supersample='false'):
-        scaled_images = []
-        for img in image:
-            scaled_images.append(
-                self.apply_resize_and_crop(tensor2pil(img), width, height, alignment, resampling, supersample))
-
-        scaled_images = torch.cat(scaled_images, dim=0)
-
-        return (scaled_images,)
-
-    def apply_resize_and_crop(self, image: Image.Image, width: int, height: int, alignment: str, resample: str, supersample: str):
-        # Define a dictionary of resampling filters
-        resample_filters = {
-            'nearest': Image.NEAREST,
-            'bilinear': Image.BILINEAR,
-            'bicubic': Image.BICUBIC,
-            'lanczos': Image.LANCZOS
-        }
+                              supersample='false', precision='auto'):
+        precision = resolve_precision(precision, image)
+        batch, image_height, image_width, channels = image.shape
+        out_shape = (batch, height, width, channels)
+        # Only the crop (plus the supersample border) is resampled, and the crop itself
+        samples = 65 if supersample == 'true' else 1
+        resized_pixels = (width + 2 * SUPERSAMPLE_BORDER) * (height + 2 * SUPERSAMPLE_BORDER) * samples + width * height
+
+        if resample_on_device(resampling, image):
+            def resize_chunk(chunk):
+                return self.apply_resize_and_crop_tensor(chunk, width, height, alignment, resampling, supersample)
+
+            # Float32 working memory per frame: the source window under the crop, the
+            # (supersampled) crop and its horizontal pass
+            new_width, new_height, left, top = self.resize_and_crop_geometry(image_width, image_height, width, height, alignment)
+            x0, x1 = resample_span(image_width, new_width, resampling, left, left + width)
+            y0, y1 = resample_span(image_height, new_height, resampling, top, top + height)
+            frame_bytes = 4 * channels * ((x1 - x0) * (y1 - y0) + 2 * resized_pixels)
+        else:
+            # Only the source window under the crop is converted to PIL
+            x0, y0, x1, y1 = self.source_window(image_width, image_height, width, height, alignment, resampling, supersample)
+            frame_bytes = 4 * channels * ((x1 - x0) * (y1 - y0) + resized_pixels)
+
+            def resize_frame(img):
+                return self.apply_resize_and_crop(tensor2pil(img[y0:y1, x0:x1]), width, height, alignment, resampling,
+                                                  supersample, precision, source=(x0, y0, image_width, image_height))
 
+            def resize_chunk(chunk):
+                with phase("resize"):
+                    frames = map_ordered(resize_frame, chunk)
+                return torch.cat(frames, dim=0).reshape(-1, height, width, channels).to(image.device)
+
+        return (process_in_chunks(image, out_shape, precision, resize_chunk, frame_bytes),)
+
+    @staticmethod
+    def resize_and_crop_geometry(image_width, image_height, width, height, alignment):
+        """Size to scale the image to so it covers the target, and the crop box within it."""
         # Calculate the ratio and the size for scaling
-        original_ratio = image.width / image.height
+        original_ratio = image_width / image_height
         target_ratio = width / height
 
         if original_ratio > target_ratio:
@@ -64,13 +89,9 @@ class ImageResizeAndCropNode:
             new_width = width
             new_height = int(new_width / original_ratio)
 
-        # Apply supersample if needed
-        if supersample == 'true':
-            factor = 8  # Factor by which to scale up before scaling down
-            image = image.resize((new_width * factor, new_height * factor), resample=resample_filters[resample])
-
-        # Resize the image
-        image = image.resize((new_width, new_height), resample=resample_filters[resample])
+        # Float rounding can land one pixel short of the target
+        new_width = max(new_width, width)
+        new_height = max(new_height, height)
 
         # Determine cropping coordinates
         left, top = 0, 0
@@ -87,10 +108,69 @@ class ImageResizeAndCropNode:
         elif 'bottom' in alignment:
             top = new_height - height
 
-        right = left + width
-        bottom = top + height
+        return new_width, new_height, int(left), int(top)
+
+    def source_window(self, image_width, image_height, width, height, alignment, resample, supersample):
+        """(x0, y0, x1, y1) of the source pixels the resize and crop reads with a PIL filter."""
+        if resample == 'nearest':
+            # The PIL nearest path resizes the whole frame
+            return 0, 0, image_width, image_height
+        new_width, new_height, left, top = self.resize_and_crop_geometry(image_width, image_height, width, height, alignment)
+        border = SUPERSAMPLE_BORDER if supersample == 'true' else 0
+        x0, x1 = resample_span(image_width, new_width, resample, max(0, left - border), min(new_width, left + width + border))
+        y0, y1 = resample_span(image_height, new_height, resample, max(0, top - border), min(new_height, top + height + border))
+        # One pixel of slack for the finer sample positions of the supersample pass
+        return max(0, x0 - 1), max(0, y0 - 1), min(image_width, x1 + 1), min(image_height, y1 + 1)
+
+    def apply_resize_and_crop_tensor(self, image, width: int, height: int, alignment: str, resample: str, supersample: str):
+        # image is [B, H, W, C] of any precision, stays on its device. Returns float32.
+        # Only the output pixels of the crop are computed, from the source pixels under them
+        new_width, new_height, left, top = self.resize_and_crop_geometry(image.shape[2], image.shape[1], width, height, alignment)
+        crop = (left, top, left + width, top + height)
+
+        with phase("resize"):
+            # Apply supersample if needed
+            if supersample == 'true':
+                factor = 8  # Factor by which to scale up before scaling down
+                # Build only the part of the supersampled frame that the downscale reads
+                x0, x1 = resample_span(new_width * factor, new_width, resample, left, left + width)
+                y0, y1 = resample_span(new_height * factor, new_height, resample, top, top + height)
+                image = resize_tensor(image, new_width * factor, new_height * factor, resample, crop=(x0, y0, x1, y1))
+                return resize_tensor(image, new_width, new_height, resample, crop=crop,
+                                     source=(x0, y0, new_width * factor, new_height * factor))
+
+            return resize_tensor(image, new_width, new_height, resample, crop=crop)
+
+    def apply_resize_and_crop(self, image: Image.Image, width: int, height: int, alignment: str, resample: str, supersample: str,
+                              precision: str = 'float32', source=None):
+        # source = (x, y, full_width, full_height) when image is only the window at (x, y) of the frame
+        offset_x, offset_y, full_width, full_height = source if source is not None else (0, 0, image.width, image.height)
+        new_width, new_height, left, top = self.resize_and_crop_geometry(full_width, full_height, width, height, alignment)
+
+        if resample == 'nearest':
+            # With a box PIL rounds exact pixel edges differently, so nearest (which is cheap,
+            # there is no filter) resizes the whole frame to keep the framing of resize-then-crop
+            if supersample == 'true':
+                image = image.resize((new_width * 8, new_height * 8), resample=RESAMPLE_FILTERS[resample])
+            image = image.resize((new_width, new_height), resample=RESAMPLE_FILTERS[resample])
+            return pil2tensor(image.crop((left, top, left + width, top + height)), precision)
+
+        # Map the crop back into source coordinates and resample only that region
+        scale_x, scale_y = full_width / new_width, full_height / new_height
+        box = (left * scale_x - offset_x, top * scale_y - offset_y,
+               (left + width) * scale_x - offset_x, (top + height) * scale_y - offset_y)
+
+        # Apply supersample if needed
+        if supersample == 'true':
+            factor = 8  # Factor by which to scale up before scaling down
+            # Upscale the crop with a border so the downscale filter sees the same neighbours
+            x0, y0 = max(0, left - SUPERSAMPLE_BORDER), max(0, top - SUPERSAMPLE_BORDER)
+            x1, y1 = min(new_width, left + width + SUPERSAMPLE_BORDER), min(new_height, top + height + SUPERSAMPLE_BORDER)
+            image = image.resize(((x1 - x0) * factor, (y1 - y0) * factor), resample=RESAMPLE_FILTERS[resample],
+                                 box=(x0 * scale_x - offset_x, y0 * scale_y - offset_y, x1 * scale_x - offset_x, y1 * scale_y - offset_y))
+            box = ((left - x0) * factor, (top - y0) * factor, (left - x0 + width) * factor, (top - y0 + height) * factor)
 
-        # Crop the image
-        image = image.crop((int(left), int(top), int(right), int(bottom)))
+        # Resize the crop window straight to the target size
+        image = image.resize((width, height), resample=RESAMPLE_FILTERS[resample], box=box)
 
-        return pil2tensor(image)
+        return pil2tensor(image, precision)
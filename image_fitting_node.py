@@ -2,7 +2,9 @@ from PIL import Image
 import torch
 import numpy as np
 
-from .utils import pil2tensor, tensor2pil
+from .utils import (pil2tensor, tensor2pil, resize_tensor, paste_tensor, resample_on_device, to_rgb, resolve_precision,
+                    to_float, process_in_chunks, map_ordered, RESAMPLE_FILTERS, PRECISION_INPUT)
+from .instrumentation import phase
 
 
 class ImageSquareAdapterNode:
@@ -22,6 +24,9 @@ class ImageSquareAdapterNode:
                 "resampling": (["lanczos", "nearest", "bilinear", "bicubic"], {"default": "lanczos"}),
                 "supersample": (["true", "false"], {"default": "false"}),
                 "fitting_mode": (["none", "top", "bottom", "center"], {"default": "none"}),
+            },
+            "optional": {
+                "precision": PRECISION_INPUT,
             }
         }
 
@@ -31,29 +36,75 @@ class ImageSquareAdapterNode:
     CATEGORY = "Nimbus-Pack/Image"
 
     def image_fit_in_square(self, image, target_size=224, fill_color='255,255,255', resampling='lanczos',
-                            supersample='false', fitting_mode='none'):
-        scaled_images = []
-        for img in image:
-            scaled_images.append(
-                self.apply_fit_image(tensor2pil(img), target_size, fill_color, resampling, supersample, fitting_mode))
+                            supersample='false', fitting_mode='none', precision='auto'):
+        precision = resolve_precision(precision, image)
+        batch, image_height, image_width, _ = image.shape
+        out_shape = (batch, target_size, target_size, 3)
 
-        scaled_images = torch.cat(scaled_images, dim=0)
+        # Float32 working memory per frame: resized frame (up to 65x with supersampling) plus the canvas
+        resized_pixels = target_size * target_size * (65 if supersample == 'true' else 2)
+        frame_bytes = 4 * 3 * (resized_pixels + target_size * target_size)
 
-        return (scaled_images,)
+        if resample_on_device(resampling, image):
+            def fit_chunk(chunk):
+                return self.apply_fit_image_tensor(chunk, target_size, fill_color, resampling, supersample, fitting_mode)
+
+            frame_bytes += 4 * 3 * image_width * image_height
+        else:
+            def fit_frame(img):
+                return self.apply_fit_image(tensor2pil(img), target_size, fill_color, resampling, supersample, fitting_mode, precision)
+
+            def fit_chunk(chunk):
+                with phase("resize"):
+                    frames = map_ordered(fit_frame, chunk)
+                return torch.cat(frames, dim=0).to(image.device)
+
+        return (process_in_chunks(image, out_shape, precision, fit_chunk, frame_bytes),)
+
+    @staticmethod
+    def fit_position(target_size, new_size, fitting_mode):
+        """Paste position of the resized image on the square canvas."""
+        if fitting_mode == 'none':
+            # Current behavior - centering the image
+            return ((target_size - new_size[0]) // 2, (target_size - new_size[1]) // 2)
+        elif fitting_mode == 'top':
+            return (0, 0)
+        elif fitting_mode == 'bottom':
+            return (0, target_size - new_size[1])
+        elif fitting_mode == 'center':
+            return (0, (target_size - new_size[1]) // 2)
+
+    def apply_fit_image_tensor(self, image, target_size: int, fill_color: str, resample: str, supersample: str,
+                               fitting_mode: str):
+        # image is [B, H, W, C] of any precision, stays on its device. Returns float32.
+        image = to_float(to_rgb(image))
+        fill_color = torch.tensor(tuple(map(int, fill_color.split(','))), dtype=torch.float32, device=image.device) / 255.0
+
+        # Calculate scaling factor and new size
+        scaling_factor = target_size / float(max(image.shape[2], image.shape[1]))
+        new_size = (int(image.shape[2] * scaling_factor), int(image.shape[1] * scaling_factor))
+
+        with phase("resize"):
+            # Apply supersample if needed
+            if supersample == 'true':
+                factor = 8  # Factor by which to scale up before scaling down
+                image = resize_tensor(image, new_size[0] * factor, new_size[1] * factor, resample)
+
+            image = resize_tensor(image, new_size[0], new_size[1], resample)
+
+            if fitting_mode != 'none':
+                # Resize width to target size, adjust height placement based on the fitting_mode
+                new_size = (target_size, int(new_size[1] * (target_size / float(new_size[0]))))
+                image = resize_tensor(image, new_size[0], new_size[1], resample)
+
+        canvas = fill_color.expand(image.shape[0], target_size, target_size, 3).clone()
+        return paste_tensor(canvas, image, *self.fit_position(target_size, new_size, fitting_mode))
 
     def apply_fit_image(self, image: Image.Image, target_size: int, fill_color: str, resample: str, supersample: str,
-                        fitting_mode: str):
+                        fitting_mode: str, precision: str = 'float32'):
         # Convert fill_color string to tuple
         fill_color = tuple(map(int, fill_color.split(',')))
 
-        # Define a dictionary of resampling filters
-        resample_filters = {
-            'nearest': Image.NEAREST,
-            'bilinear': Image.BILINEAR,
-            'bicubic': Image.BICUBIC,
-            'lanczos': Image.LANCZOS
-        }
-
         # Calculate scaling factor and new size
         scaling_factor = target_size / float(max(image.size))
         new_size = tuple([int(x * scaling_factor) for x in image.size])
@@ -61,31 +112,18 @@ class ImageSquareAdapterNode:
         # Apply supersample if needed
         if supersample == 'true':
             factor = 8  # Factor by which to scale up before scaling down
-            image = image.resize((new_size[0] * factor, new_size[1] * factor), resample=resample_filters[resample])
+            image = image.resize((new_size[0] * factor, new_size[1] * factor), resample=RESAMPLE_FILTERS[resample])
 
         # Resize the image
-        image = image.resize(new_size, resample=resample_filters[resample])
+        image = image.resize(new_size, resample=RESAMPLE_FILTERS[resample])
 
-        # Adjust image fitting based on the mode
-        if fitting_mode == 'none':
-            # Current behavior - centering the image
-            new_img = Image.new("RGB", (target_size, target_size), fill_color)
-            position = ((target_size - new_size[0]) // 2, (target_size - new_size[1]) // 2)
-            new_img.paste(image, position)
-        else:
+        if fitting_mode != 'none':
             # Resize width to target size, adjust height placement based on the fitting_mode
             width, height = image.size
-            new_height = int(height * (target_size / float(width)))
-            image = image.resize((target_size, new_height), resample=resample_filters[resample])
-            new_img = Image.new("RGB", (target_size, target_size), fill_color)
-
-            if fitting_mode == 'top':
-                position = (0, 0)
-            elif fitting_mode == 'bottom':
-                position = (0, target_size - new_height)
-            elif fitting_mode == 'center':
-                position = (0, (target_size - new_height) // 2)
+            new_size = (target_size, int(height * (target_size / float(width))))
+            image = image.resize(new_size, resample=RESAMPLE_FILTERS[resample])
 
-            new_img.paste(image, position)
+        new_img = Image.new("RGB", (target_size, target_size), fill_color)
+        new_img.paste(image, self.fit_position(target_size, new_size, fitting_mode))
 
-        return pil2tensor(new_img)
+        return pil2tensor(new_img, precision)
@@ -1,5 +1,7 @@
 import torch
 
+from .utils import image_precision, to_precision
+
 class ImageExtractRect:
     @classmethod
     def INPUT_TYPES(s):
@@ -123,6 +125,9 @@ class ImageCombineRect:
         # Let's try direct assignment. If dimensions mismatch, it will raise error.
         # We take the relevant region from source
         source_region = source_image[:, src_start_y:src_start_y+paste_h, src_start_x:src_start_x+paste_w, :]
+
+        # Keep the destination's precision (float32, float16 or uint8)
+        source_region = to_precision(source_region, image_precision(destination_image))
         
         if src_batch != dst_batch and src_batch == 1:
             source_region = source_region.expand(dst_batch, -1, -1, -1)
@@ -0,0 +1,26 @@
+from .utils import to_precision, PRECISIONS
+
+
+class ImageConvertPrecision:
+    """
+    Converts an image batch between float32, float16 and uint8.
+    The Nimbus image nodes accept the compact precisions natively, place this node
+    at the boundary to nodes that expect ComfyUI's regular float32 images.
+    """
+
+    @classmethod
+    def INPUT_TYPES(s):
+        return {
+            "required": {
+                "image": ("IMAGE",),
+                "precision": (list(PRECISIONS), {"default": "float32"}),
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("image",)
+    FUNCTION = "convert_precision"
+    CATEGORY = "Nimbus-Pack/Image"
+
+    def convert_precision(self, image, precision):
+        return (to_precision(image, precision),)
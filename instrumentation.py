@@ -0,0 +1,272 @@
+"""
+Opt-in per-node timing and memory instrumentation.
+
+Set ``NIMBUS_PROFILE`` to a file path (or to ``1`` for ``nimbus_profile.jsonl`` in the
+working directory) before ComfyUI starts. Every Nimbus node's ``FUNCTION`` entry point
+is then wrapped and one JSON line per call is appended to that file with the wall time,
+input/output tensor shapes and bytes, peak RSS growth during the call (sampled from the
+current RSS, so it is not hidden by earlier calls) and the time spent in sub-phases
+(``with phase("resize"): ...``). When the variable is unset nothing is wrapped and
+``phase`` returns a shared no-op context manager.
+
+Summarize a recording with:
+
+    python instrumentation.py nimbus_profile.jsonl
+"""
+import argparse
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = "NIMBUS_PROFILE"
+DEFAULT_PROFILE_PATH = "nimbus_profile.jsonl"
+
+
+def _profile_path():
+    value = os.environ.get(ENV_VAR, "").strip()
+    if not value or value.lower() in ("0", "false", "off"):
+        return None
+    if value.lower() in ("1", "true", "on"):
+        return os.path.abspath(DEFAULT_PROFILE_PATH)
+    return os.path.abspath(value)
+
+
+PROFILE_PATH = _profile_path()
+ENABLED = PROFILE_PATH is not None
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_NULL_PHASE = contextlib.nullcontext()
+
+
+def current_rss_bytes():
+    """Current resident set size of the process (/proc or psutil), or None where unsupported."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+class RssSampler:
+    """
+    Context manager measuring the peak RSS growth over its block. A background thread
+    samples the current RSS every ``interval`` seconds, unlike the process high-water
+    mark (ru_maxrss) which stops moving once an earlier call has raised it.
+    ``peak_delta_bytes`` is None where the RSS can't be read.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.start_bytes = None
+        self.peak_bytes = None
+        self.peak_delta_bytes = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_bytes()
+        if rss is not None and rss > self.peak_bytes:
+            self.peak_bytes = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start_bytes = current_rss_bytes()
+        if self.start_bytes is not None:
+            self.peak_bytes = self.start_bytes
+            self._thread = threading.Thread(target=self._run, name="nimbus-rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+            self.peak_delta_bytes = self.peak_bytes - self.start_bytes
+        return False
+
+
+@contextlib.contextmanager
+def _timed_phase(name):
+    record = getattr(_local, "record", None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if record is not None:
+            phases = record["phases"]
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def phase(name):
+    """Context manager accumulating the time of a sub-phase into the current node call."""
+    if not ENABLED:
+        return _NULL_PHASE
+    return _timed_phase(name)
+
+
+def describe_value(value):
+    """JSON-friendly description of a node input or output: shapes and bytes for tensors."""
+    if hasattr(value, "shape") and hasattr(value, "element_size"):
+        return {"shape": list(value.shape), "dtype": str(value.dtype), "bytes": value.numel() * value.element_size()}
+    if hasattr(value, "shape") and hasattr(value, "nbytes"):
+        return {"shape": list(value.shape), "dtype": str(value.dtype), "bytes": int(value.nbytes)}
+    if isinstance(value, (list, tuple)):
+        items = [describe_value(v) for v in value]
+        total = sum(item.get("bytes", 0) for item in items if isinstance(item, dict))
+        if len(items) > 8:
+            items = items[:8] + ["..."]
+        return {"items": items, "count": len(value), "bytes": total}
+    if isinstance(value, dict):
+        return {key: describe_value(v) for key, v in value.items()}
+    if isinstance(value, (int, float, bool, str)) or value is None:
+        return value
+    return type(value).__name__
+
+
+def _value_bytes(description):
+    return description.get("bytes", 0) if isinstance(description, dict) else 0
+
+
+def _write(record):
+    line = json.dumps(record, default=str)
+    with _write_lock:
+        with open(PROFILE_PATH, "a") as f:
+            f.write(line + "\n")
+
+
+def instrument_node(node_name, cls):
+    """Wrap ``cls.FUNCTION`` so each call is recorded. Safe to call more than once."""
+    function_name = cls.FUNCTION
+    original = getattr(cls, function_name)
+    if getattr(original, "_nimbus_instrumented", False):
+        return cls
+
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        record = {"node": node_name, "function": function_name, "timestamp": time.time(), "phases": {}}
+        parent = getattr(_local, "record", None)
+        _local.record = record
+        sampler = RssSampler()
+        start = time.perf_counter()
+        try:
+            with sampler:
+                result = original(self, *args, **kwargs)
+            record["outputs"] = describe_value(result)
+            return result
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_s"] = time.perf_counter() - start
+            record["peak_rss_delta_bytes"] = sampler.peak_delta_bytes
+            inputs = {f"arg{i}": describe_value(v) for i, v in enumerate(args)}
+            inputs.update({key: describe_value(v) for key, v in kwargs.items()})
+            record["inputs"] = inputs
+            record["input_bytes"] = sum(_value_bytes(v) for v in inputs.values())
+            record["output_bytes"] = _value_bytes(record.get("outputs"))
+            _local.record = parent
+            _write(record)
+
+    wrapper._nimbus_instrumented = True
+    setattr(cls, function_name, wrapper)
+    return cls
+
+
+def instrument_nodes(node_class_mappings):
+    """Instrument every node in a ``NODE_CLASS_MAPPINGS`` dict when profiling is enabled."""
+    if not ENABLED:
+        return
+    for node_name, cls in node_class_mappings.items():
+        instrument_node(node_name, cls)
+    print(f"Nimbus Nodes: profiling enabled, writing to {PROFILE_PATH}")
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def load_records(path):
+    records = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(records):
+    """Aggregate records per node, sorted by total wall time (largest first)."""
+    per_node = {}
+    for record in records:
+        per_node.setdefault(record["node"], []).append(record)
+
+    summary = []
+    for node_name, calls in per_node.items():
+        walls = [c["wall_s"] for c in calls]
+        rss = [c["peak_rss_delta_bytes"] for c in calls if c.get("peak_rss_delta_bytes") is not None]
+        phases = {}
+        for c in calls:
+            for name, seconds in c.get("phases", {}).items():
+                phases[name] = phases.get(name, 0.0) + seconds
+        summary.append({
+            "node": node_name,
+            "calls": len(calls),
+            "errors": sum(1 for c in calls if "error" in c),
+            "total_s": sum(walls),
+            "mean_s": sum(walls) / len(walls),
+            "p95_s": _percentile(walls, 95),
+            "max_s": max(walls),
+            "max_rss_delta_mb": max(rss) / (1024 * 1024) if rss else None,
+            "input_mb": sum(c.get("input_bytes", 0) for c in calls) / (1024 * 1024),
+            "output_mb": sum(c.get("output_bytes", 0) for c in calls) / (1024 * 1024),
+            "phases_s": phases,
+        })
+    summary.sort(key=lambda s: s["total_s"], reverse=True)
+    return summary
+
+
+def format_summary(summary):
+    header = f"{'node':<32} {'calls':>6} {'total s':>9} {'mean s':>9} {'p95 s':>9} {'max s':>9} {'rss MB':>8} {'in MB':>9} {'out MB':>9}  phases"
+    lines = [header, "-" * len(header)]
+    for s in summary:
+        rss = f"{s['max_rss_delta_mb']:8.1f}" if s["max_rss_delta_mb"] is not None else f"{'n/a':>8}"
+        phases = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in sorted(s["phases_s"].items()))
+        lines.append(f"{s['node']:<32} {s['calls']:>6} {s['total_s']:9.3f} {s['mean_s']:9.4f} {s['p95_s']:9.4f} "
+                     f"{s['max_s']:9.4f} {rss} {s['input_mb']:9.1f} {s['output_mb']:9.1f}  {phases}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a Nimbus node profile (JSON lines).")
+    parser.add_argument("profile", nargs="?", default=DEFAULT_PROFILE_PATH, help="Profile file written with NIMBUS_PROFILE")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary = summarize(load_records(args.profile))
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
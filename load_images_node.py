@@ -1,7 +1,88 @@
+import json
 import os
 import torch
 import numpy as np
 from PIL import Image, ImageOps
+try:
+    from comfy_execution.graph import ExecutionBlocker
+except ImportError:
+    # ComfyUI before execution blocking
+    ExecutionBlocker = None
+
+from .instrumentation import phase
+from .utils import CREATED_PRECISION_INPUT
+
+# 16-bit integer modes (PNG, TIFF). 'I' is 32-bit but PIL uses it for 16-bit PNGs.
+HIGH_BIT_MODES = ('I;16', 'I;16L', 'I;16B', 'I;16N', 'I')
+
+
+def normalized_to_precision(array, precision):
+    """Convert a float32 numpy image in [0, 1] to the given precision."""
+    if precision == 'uint8':
+        return np.rint(array * 255.0).astype(np.uint8)
+    if precision == 'float16':
+        return array.astype(np.float16)
+    return array
+
+
+def decode_image(image_path, precision='float32'):
+    """
+    Decode an image file into a [H, W, 3] array of the given precision and a [H, W]
+    float32 mask (1 - alpha, zeros when the image has no alpha).
+    16-bit and float sources are normalized with vectorized numpy, without an 8-bit detour.
+    """
+    img = Image.open(image_path)
+    img = ImageOps.exif_transpose(img)
+
+    mask = None
+    if img.mode in HIGH_BIT_MODES:
+        data = np.asarray(img, dtype=np.float32) * (1.0 / 65535.0)
+        data = np.clip(data, 0.0, 1.0)
+        image = np.repeat(data[:, :, None], 3, axis=2)
+        return normalized_to_precision(image, precision), mask_or_zeros(mask, data.shape)
+
+    if img.mode == 'F':
+        data = np.clip(np.asarray(img, dtype=np.float32), 0.0, 1.0)
+        image = np.repeat(data[:, :, None], 3, axis=2)
+        return normalized_to_precision(image, precision), mask_or_zeros(mask, data.shape)
+
+    if 'A' in img.getbands() or 'transparency' in img.info:
+        img = img.convert('RGBA')
+        mask = 1.0 - np.asarray(img.getchannel('A'), dtype=np.float32) * (1.0 / 255.0)
+
+    rgb = np.array(img.convert('RGB'))
+    if precision == 'uint8':
+        image = rgb
+    elif precision == 'float16':
+        image = rgb.astype(np.float16) / np.float16(255)
+    else:
+        image = rgb.astype(np.float32) * (1.0 / 255.0)
+    return image, mask_or_zeros(mask, rgb.shape[:2])
+
+
+def mask_or_zeros(mask, shape):
+    return mask if mask is not None else np.zeros(shape, dtype=np.float32)
+
+
+def load_cursor(cursor_path):
+    """Files already ingested in incremental mode: {file name: [mtime_ns, size]}."""
+    if not os.path.isfile(cursor_path):
+        return {}
+    try:
+        with open(cursor_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"Warning: LoadImagesFromFolder could not read cursor {cursor_path}, starting over.")
+        return {}
+
+
+def save_cursor(cursor_path, cursor):
+    # Write to a temp file and rename so a crash never leaves a truncated cursor
+    temp_path = cursor_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(cursor, f)
+    os.replace(temp_path, cursor_path)
+
 
 class LoadImagesFromFolder:
     @classmethod
@@ -10,46 +91,81 @@ class LoadImagesFromFolder:
             "required": {
                 "folder_path": ("STRING", {"default": ""}),
             },
+            "optional": {
+                "precision": CREATED_PRECISION_INPUT,
+                "incremental": ("BOOLEAN", {"default": False, "tooltip": "Only load files added or changed since the previous run (hot folder)"}),
+                "max_per_run": ("INT", {"default": 0, "min": 0, "max": 100000, "step": 1, "tooltip": "Incremental mode: maximum files per run, 0 for no limit"}),
+                "cursor_file": ("STRING", {"default": "", "tooltip": "Incremental mode: where to persist the files already seen. Defaults to .nimbus_cursor.json in the folder"}),
+            },
         }
 
     @classmethod
-    def IS_CHANGED(s, folder_path):
+    def IS_CHANGED(s, folder_path, **kwargs):
         return float("NaN")
 
-    RETURN_TYPES = ("IMAGE",)
-    RETURN_NAMES = ("images",)
-    OUTPUT_IS_LIST = (True,)
+    RETURN_TYPES = ("IMAGE", "MASK")
+    RETURN_NAMES = ("images", "masks")
+    OUTPUT_IS_LIST = (True, True)
     FUNCTION = "load_images"
     CATEGORY = "Nimbus-Pack/Image"
 
-    def load_images(self, folder_path):
+    VALID_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.webp', '.tif', '.tiff']
+
+    CURSOR_FILE_NAME = ".nimbus_cursor.json"
+
+    def load_images(self, folder_path, precision="float32", incremental=False, max_per_run=0, cursor_file=""):
         if not os.path.isdir(folder_path):
             raise FileNotFoundError(f"Folder not found: {folder_path}")
 
-        valid_extensions = ['.png', '.jpg', '.jpeg']
-        image_files = [
-            f for f in os.listdir(folder_path)
-            if os.path.isfile(os.path.join(folder_path, f)) and 
-               os.path.splitext(f)[1].lower() in valid_extensions
-        ]
-        
-        image_files.sort()
+        valid_extensions = self.VALID_EXTENSIONS
+
+        # scandir gives names and stat results without decoding anything
+        entries = {
+            entry.name: entry for entry in os.scandir(folder_path)
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in valid_extensions
+        }
+        image_files = sorted(entries)
+
+        if incremental:
+            cursor_path = cursor_file or os.path.join(folder_path, self.CURSOR_FILE_NAME)
+            cursor = load_cursor(cursor_path)
+            signatures = {}
+            for name in image_files:
+                stat = entries[name].stat()
+                signatures[name] = [stat.st_mtime_ns, stat.st_size]
+
+            # Only files that are new or whose mtime/size changed since the previous run
+            image_files = [name for name in image_files if cursor.get(name) != signatures[name]]
+            if max_per_run > 0:
+                image_files = image_files[:max_per_run]
 
         images = []
+        masks = []
         for file_name in image_files:
             image_path = os.path.join(folder_path, file_name)
-            img = Image.open(image_path)
-            img = ImageOps.exif_transpose(img)
-            if img.mode == 'I':
-                img = img.point(lambda i: i * (1 / 256)).convert('RGB')
-            img = img.convert("RGB")
-            img = np.array(img).astype(np.float32) / 255.0
-            img = torch.from_numpy(img)[None,]
-            images.append(img)
+            with phase("decode"):
+                img, mask = decode_image(image_path, precision)
+            images.append(torch.from_numpy(img)[None,])
+            masks.append(torch.from_numpy(mask)[None,])
+
+        if incremental:
+            # Forget deleted files, remember the ones loaded in this run. The cursor is saved
+            # before the downstream nodes run, so ingestion is at most once: files of a run
+            # that fails later are not loaded again.
+            cursor = {name: value for name, value in cursor.items() if name in signatures}
+            cursor.update({name: signatures[name] for name in image_files})
+            save_cursor(cursor_path, cursor)
+
+            if not images:
+                # Nothing new is the normal state of a hot folder. Empty output lists would
+                # be indexed by the downstream nodes, so block them for this run instead.
+                if ExecutionBlocker is None:
+                    raise ValueError(f"No new images found in {folder_path} since the previous run")
+                return ([ExecutionBlocker(None)], [ExecutionBlocker(None)])
 
         if not images:
              # Return an empty tensor if no images found, though this might cause issues downstream if not handled.
              # Better to raise an error or return a dummy. For now, let's raise an error to alert the user.
              raise ValueError(f"No valid images found in {folder_path} with extensions {valid_extensions}")
 
-        return (images,)
+        return (images, masks)
@@ -15,64 +15,43 @@ parser.add_argument('--target_height', type=int, default=1080,
 # The target_resolution variable will be derived from the target_height argument
 args = parser.parse_args()
 
-def resize_and_center_image(image1, image2, background_color=(255, 255, 255)):
+def fit_images_to_height(image1, image2, target_height, background_color=(255, 255, 255)):
     """
-    Resize image1 to fit within the resolution of image2 while maintaining its aspect ratio,
-    and paste it centered onto a canvas of the same resolution as image2 with a specified background color.
+    Letterbox image1 on image2's canvas and scale both to target_height, with the geometry
+    composed up front so each image is resampled exactly once.
 
-    Args:
-    - image1 (PIL.Image): The first input image.
-    - image2 (PIL.Image): The second input image, which determines the canvas size.
-    - background_color (tuple): The background color for the canvas in RGB.
+    Same geometry as slider_render.comparison_geometry (used by the ComfyUI nodes, which
+    this standalone script cannot import), keep the two in sync.
 
     Returns:
-    - PIL.Image: The resulting combined image.
+    - (PIL.Image, PIL.Image): image1 letterboxed on image2's canvas, and image2, both at target_height.
     """
-    # Create a canvas with the resolution of image2 and the specified background color
-    canvas = Image.new("RGB", image2.size, color=background_color)
+    # Final canvas: image2 scaled to the target height
+    canvas_size = (int(target_height * image2.width / image2.height), target_height)
 
-    # Calculate the new size for image1, maintaining its aspect ratio
     img1_aspect = image1.width / image1.height
-    img2_aspect = image2.width / image2.height
-
-    if img1_aspect > img2_aspect:
+    if img1_aspect > image2.width / image2.height:
         # Image1 is wider than image2
-        new_width = image2.width
-        new_height = int(new_width / img1_aspect)
+        new_size = (canvas_size[0], max(1, int(canvas_size[0] / img1_aspect)))
     else:
         # Image1 is taller than image2
-        new_height = image2.height
-        new_width = int(new_height * img1_aspect)
-
-    # Resize image1 to fit within the canvas while maintaining its aspect ratio
-    image1_resized = image1.resize((new_width, new_height), Image.LANCZOS)
-
-    # Calculate the position to paste the resized image1 on the canvas, centered
-    paste_position = ((image2.width - new_width) // 2, (image2.height - new_height) // 2)
+        new_size = (max(1, int(canvas_size[1] * img1_aspect)), canvas_size[1])
 
-    # Paste the resized image1 onto the canvas
-    canvas.paste(image1_resized, paste_position)
+    canvas = Image.new("RGB", canvas_size, color=background_color)
+    paste_position = ((canvas_size[0] - new_size[0]) // 2, (canvas_size[1] - new_size[1]) // 2)
+    canvas.paste(image1.resize(new_size, Image.LANCZOS), paste_position)
 
-    return canvas
+    if image2.size != canvas_size:
+        image2 = image2.resize(canvas_size, Image.LANCZOS)
 
-
-def resize_image_to_height(image, target_height):
-    # Calculate new dimensions
-    original_width, original_height = image.size
-    aspect_ratio = original_width / original_height
-    new_height = target_height
-    new_width = int(new_height * aspect_ratio)
-    return image.resize((new_width, new_height))
+    return canvas, image2
 
 
 # Load and resize images
 image1 = Image.open(args.image1_path)
 image2 = Image.open(args.image2_path)
 
-image1 = resize_and_center_image(image1, image2)
-
-image1_resized = resize_image_to_height(image1, args.target_height)
-image2_resized = resize_image_to_height(image2, args.target_height)
+image1_resized, image2_resized = fit_images_to_height(image1, image2, args.target_height)
 
 # Convert images to numpy arrays
 image1_array = np.array(image1_resized)
@@ -0,0 +1,164 @@
+"""
+Opt-in content-hash memoization for deterministic image nodes.
+
+ComfyUI caches node outputs by input identity, so identical images coming from a
+different upstream object are processed again. With ``NIMBUS_MEMO_MB`` set to a byte
+budget in megabytes, the nodes listed in ``MEMOIZED_NODES`` cache their outputs keyed
+by a content hash of the input tensors plus the other parameters, with defaults filled
+in so positional, keyword and omitted arguments share an entry. Only CPU tensors are
+hashed: calls holding accelerator tensors run uncached rather than copying the inputs
+to the host for a hash. Entries are evicted least recently used first once the budget
+is exceeded. Hits and misses are logged.
+"""
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "NIMBUS_MEMO_MB"
+
+# Nodes whose output depends only on their inputs
+MEMOIZED_NODES = ("AutoLevelsNode", "ImageResizeAndCropNode", "ImageSquareAdapterNode")
+
+
+def _budget_bytes():
+    try:
+        return int(float(os.environ.get(ENV_VAR, "0")) * 1024 * 1024)
+    except ValueError:
+        return 0
+
+
+def tensor_digest(tensor):
+    """Fast content hash of a CPU tensor's bytes (xxhash when installed, else blake2b)."""
+    data = tensor.detach().contiguous().view(torch.uint8).numpy()
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def value_key(value):
+    """Hashable key for a node argument: tensors by shape, dtype and content, the rest by repr."""
+    if isinstance(value, torch.Tensor):
+        return ("tensor", tuple(value.shape), str(value.dtype), str(value.device), tensor_digest(value))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(value_key(v) for v in value)
+    if isinstance(value, dict):
+        return ("dict",) + tuple((k, value_key(v)) for k, v in sorted(value.items()))
+    return repr(value)
+
+
+def holds_device_tensor(value):
+    """Whether a node argument contains a tensor that is not in host memory."""
+    if isinstance(value, torch.Tensor):
+        return value.device.type != "cpu"
+    if isinstance(value, (list, tuple)):
+        return any(holds_device_tensor(v) for v in value)
+    if isinstance(value, dict):
+        return any(holds_device_tensor(v) for v in value.values())
+    return False
+
+
+def result_bytes(value):
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (list, tuple)):
+        return sum(result_bytes(v) for v in value)
+    return 0
+
+
+class MemoCache:
+    """LRU cache with a byte budget and hit/miss/eviction counters."""
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = result_bytes(value)
+        if size > self.budget_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.budget_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self):
+        return (f"hits={self.hits} misses={self.misses} evictions={self.evictions} "
+                f"entries={len(self.entries)} size={self.total_bytes / (1024 * 1024):.1f}/"
+                f"{self.budget_bytes / (1024 * 1024):.0f}MB")
+
+
+def memoize_node(node_name, cls, cache):
+    """Wrap ``cls.FUNCTION`` so calls with identical content are served from the cache."""
+    function_name = cls.FUNCTION
+    original = getattr(cls, function_name)
+    if getattr(original, "_nimbus_memoized", False):
+        return cls
+    signature = inspect.signature(original)
+
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(list(bound.arguments.items())[1:])
+        if holds_device_tensor(arguments):
+            # Hashing would copy the inputs off the accelerator, run uncached instead
+            return original(self, *args, **kwargs)
+        key = (node_name, value_key(arguments))
+        result = cache.get(key)
+        if result is not None:
+            logger.info(f"Nimbus memo hit {node_name} ({cache.stats()})")
+            return result
+        result = original(self, *args, **kwargs)
+        cache.put(key, result)
+        logger.debug(f"Nimbus memo miss {node_name} ({cache.stats()})")
+        return result
+
+    wrapper._nimbus_memoized = True
+    setattr(cls, function_name, wrapper)
+    return cls
+
+
+def memoize_nodes(node_class_mappings, node_names=MEMOIZED_NODES):
+    """Memoize the deterministic nodes when NIMBUS_MEMO_MB is set. Returns the cache or None."""
+    budget = _budget_bytes()
+    if budget <= 0:
+        return None
+    cache = MemoCache(budget)
+    for node_name in node_names:
+        if node_name in node_class_mappings:
+            memoize_node(node_name, node_class_mappings[node_name], cache)
+    print(f"Nimbus Nodes: memoization enabled, budget {budget / (1024 * 1024):.0f}MB")
+    return cache
@@ -1,3 +1,6 @@
+import json
+import math
+
 from .utils import align_int_value, clamp
 
 import torch
@@ -47,6 +50,161 @@ class AdjustAndRoundDimensions:
 
 
 
+# Stages added at most beyond the minimum when aligned sizes stretch a step past the cap
+MAX_EXTRA_STAGES = 8
+
+
+def step_factor(size, next_size):
+    """Largest of the width and height ratios of one upscale step."""
+    return max(next_size[0] / size[0], next_size[1] / size[1])
+
+
+def aligned_stage_sizes(width, height, alignment, factor, stage_count):
+    """Equal-factor sizes for stage_count stages, aligned up but never past the next size."""
+    stage_factor = factor ** (1 / stage_count) if stage_count else 1.0
+
+    # Built from the final size down so each size can be clamped to the one after it
+    sizes = [(width, height)]
+    for i in reversed(range(stage_count)):
+        scale = stage_factor ** i / factor
+        next_width, next_height = sizes[0]
+        size = (min(align_int_value(max(1, int(width * scale)), alignment), next_width),
+                min(align_int_value(max(1, int(height * scale)), alignment), next_height))
+        if size != sizes[0]:
+            sizes.insert(0, size)
+    return sizes
+
+
+def upscale_stage_sizes(width, height, alignment, factor, max_stage_factor):
+    """
+    Sizes from the generation resolution (width and height divided by factor, aligned
+    like AdjustAndRoundDimensions) up to width x height. Uses the fewest stages that keep
+    every step, in width and in height, within max_stage_factor, with equal factors before
+    alignment so no stage is harder than the others. Intermediate sizes are aligned up
+    but never past the next size, and stages that would not change the size are dropped.
+    The last size is the final size itself. Returns the sizes and the largest step factor,
+    which only exceeds max_stage_factor when the alignment or whole pixels leave no
+    smaller step.
+    """
+    factor = max(1, factor)
+    stage_count = max(0, math.ceil(math.log(factor) / math.log(max_stage_factor) - 1e-9))
+
+    # Aligning up enlarges the step into an intermediate size, add stages until every step fits
+    best = None
+    for count in range(stage_count, stage_count + MAX_EXTRA_STAGES + 1):
+        sizes = aligned_stage_sizes(width, height, alignment, factor, count)
+        largest = max((step_factor(size, next_size) for size, next_size in zip(sizes, sizes[1:])), default=1.0)
+        if best is None or largest < best[0] - 1e-9:
+            best = (largest, sizes)
+        if largest <= max_stage_factor + 1e-9:
+            break
+    largest, sizes = best
+    return sizes, largest
+
+
+def tile_grid(width, height, max_pixels, overlap, alignment):
+    """
+    Fewest tiles (columns, rows, tile width, tile height) that cover width x height with
+    the given overlap and keep every tile within max_pixels. Among grids with the same
+    tile count the one with the squarest tiles wins.
+    """
+    if width * height <= max_pixels:
+        return 1, 1, width, height
+
+    def tile_length(length, count):
+        return min(length, align_int_value(math.ceil((length + (count - 1) * overlap) / count), alignment))
+
+    best = None
+    for columns in range(1, width + 1):
+        if best is not None and columns > best[0]:
+            break
+        tile_width = tile_length(width, columns)
+        if columns > 1 and tile_width <= overlap:
+            break
+        max_tile_height = max_pixels // tile_width
+        if max_tile_height < height and max_tile_height <= max(overlap, alignment):
+            continue
+
+        # Fewest rows whose tiles fit next to this tile width
+        rows = 1 if max_tile_height >= height else math.ceil((height - overlap) / (max_tile_height - overlap))
+        while rows <= height and tile_length(height, rows) > max_tile_height:
+            rows += 1
+        if rows > height:
+            continue
+
+        tile_height = tile_length(height, rows)
+        squareness = max(tile_width, tile_height) / min(tile_width, tile_height)
+        if best is None or (columns * rows, squareness) < (best[0], best[1]):
+            best = (columns * rows, squareness, columns, rows, tile_width, tile_height)
+
+    if best is None:
+        raise ValueError(f"Can't tile {width}x{height} into tiles of at most {max_pixels} pixels with an overlap of {overlap}")
+    return best[2:]
+
+
+class MultiStageUpscalePlanner:
+    """
+    Plans an upscale to a final resolution in as many stages as max_stage_factor requires.
+    Stages whose working set exceeds the memory budget are split into tiles. Returns the
+    generation size and a JSON plan with the aligned size, tile grid and estimated pixels
+    and memory of every stage.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "width": ("INT", {"default": 7680, "min": 1, "max": 32768, "step": 1}),
+                "height": ("INT", {"default": 4320, "min": 1, "max": 32768, "step": 1}),
+                "alignment": ("INT", {"default": 16, "min": 1, "max": 64, "step": 1}),
+                "factor": ("FLOAT", {"default": 4.0, "min": 1.0, "max": 64.0, "step": 0.1, "tooltip": "Total upscale factor from the generation size to the final size"}),
+                "max_stage_factor": ("FLOAT", {"default": 2.0, "min": 1.1, "max": 8.0, "step": 0.1}),
+                "stage_memory_mb": ("INT", {"default": 4096, "min": 64, "max": 1048576, "step": 64, "tooltip": "Memory available to one pass of a stage"}),
+                "bytes_per_pixel": ("INT", {"default": 48, "min": 1, "max": 65536, "step": 1, "tooltip": "Working memory per output pixel of a pass, 12 for a float32 RGB image, more for model upscalers"}),
+                "tile_overlap": ("INT", {"default": 64, "min": 0, "max": 1024, "step": 8}),
+            }
+        }
+
+    RETURN_TYPES = ("INT", "INT", "INT", "FLOAT", "STRING")
+    RETURN_NAMES = ("generation_width", "generation_height", "stage_count", "stage_factor", "plan")
+    FUNCTION = "plan_upscale"
+
+    CATEGORY = "Nimbus-Pack/Utils"
+
+    def plan_upscale(self, width, height, alignment, factor, max_stage_factor, stage_memory_mb, bytes_per_pixel, tile_overlap):
+        sizes, stage_factor = upscale_stage_sizes(width, height, alignment, factor, max_stage_factor)
+        max_pixels = stage_memory_mb * 1024 * 1024 // bytes_per_pixel
+
+        stages = []
+        for i, (stage_width, stage_height) in enumerate(sizes):
+            columns, rows, tile_width, tile_height = tile_grid(stage_width, stage_height, max_pixels, tile_overlap, alignment)
+            pass_pixels = tile_width * tile_height
+            stage = {
+                "stage": i,
+                "width": stage_width,
+                "height": stage_height,
+                "factor": 1.0 if i == 0 else round(step_factor(sizes[i - 1], sizes[i]), 4),
+                "pixels": stage_width * stage_height,
+                "tiles": [columns, rows],
+                "tile_size": [tile_width, tile_height],
+                "pass_pixels": pass_pixels,
+                "pass_memory_mb": round(pass_pixels * bytes_per_pixel / (1024 * 1024), 1),
+                # Input and output of the stage kept as float32 RGB images
+                "image_memory_mb": round(((sizes[i - 1][0] * sizes[i - 1][1] if i else 0) + stage_width * stage_height) * 12 / (1024 * 1024), 1),
+            }
+            stages.append(stage)
+
+        plan = {
+            "final_size": [width, height],
+            "stage_count": len(sizes) - 1,
+            "stage_factor": round(stage_factor, 4),
+            "max_pass_pixels": max_pixels,
+            "stages": stages,
+        }
+        generation_width, generation_height = sizes[0]
+        return (generation_width, generation_height, len(sizes) - 1, stage_factor, json.dumps(plan, indent=2))
+
+
 class AspectRatioMobileDevices:
 
     @classmethod
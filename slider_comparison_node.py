@@ -1,13 +1,37 @@
+import math
 import os
 import folder_paths
-import numpy as np
-from PIL import Image
+import torch
 try:
     from moviepy.editor import VideoClip
 except ImportError:
     # MoviePy v2.0+
     from moviepy.video.VideoClip import VideoClip
-from .utils import tensor2pil
+from .instrumentation import phase
+from .slider_render import (first_image, parse_slider_color, prepare_comparison_arrays, divider_positions, render_frames,
+                            fit_variants, frame_index, sequential_schedule, slider_schedule, render_frames_at,
+                            render_unique_frames, FrameReuse, EASING_INPUT, SUBPIXEL_INPUT)
+from .utils import tensor2pil, to_precision, PRECISIONS, CREATED_PRECISION_INPUT
+from . import encode_queue
+
+def encode_video(make_frame, video_duration, frame_rate, output_path, async_encode=False):
+    """Encode make_frame(t) to output_path, in the background if async_encode is set."""
+    def render(path):
+        # Generate video
+        # We can use MoviePy's VideoClip directly with make_frame, but main.py used ImageClip list.
+        # VideoClip is more memory efficient for long videos.
+
+        # Note: make_frame in VideoClip expects t in seconds.
+        clip = VideoClip(make_frame, duration=video_duration)
+        clip.write_videofile(path, fps=frame_rate, bitrate="5000k", codec="libx264", audio=False, logger=None)
+
+    if async_encode:
+        # Frame generation and encoding run on the background pool, the file appears when done
+        encode_queue.submit(output_path, render)
+    else:
+        with phase("encode"):
+            encode_queue.write_atomically(output_path, render)
+
 
 class SliderComparisonNode:
     """
@@ -30,6 +54,11 @@ class SliderComparisonNode:
                 "slider_thickness": ("INT", {"default": 5, "min": 1, "max": 20, "step": 1}),
                 "target_height": ("INT", {"default": 1080, "min": 100, "max": 4096, "step": 1}),
                 "filename_prefix": ("STRING", {"default": "slider_comparison"}),
+            },
+            "optional": {
+                "async_encode": encode_queue.ASYNC_ENCODE_INPUT,
+                "easing": EASING_INPUT,
+                "subpixel": SUBPIXEL_INPUT,
             }
         }
 
@@ -39,127 +68,222 @@ class SliderComparisonNode:
     CATEGORY = "Nimbus-Pack/Video"
     OUTPUT_NODE = True
 
-    def resize_and_center_image(self, image1, image2, background_color=(0, 0, 0)):
-        """
-        Resize image1 to fit within the resolution of image2 while maintaining its aspect ratio,
-        and paste it centered onto a canvas of the same resolution as image2.
-        """
-        canvas = Image.new("RGB", image2.size, color=background_color)
+    def create_comparison_video(self, image_before, image_after, video_duration, frame_rate, slider_color, slider_thickness, target_height, filename_prefix="slider_comparison", async_encode=False,
+                                easing="linear", subpixel=False):
+        # Convert tensors to PIL images
+        # Handle batch of images - take the first one if multiple are provided
+        pil_before = first_image(image_before, "before")
+        pil_after = first_image(image_after, "after")
 
-        img1_aspect = image1.width / image1.height
-        img2_aspect = image2.width / image2.height
+        # Fit before onto after's canvas and scale both to target height
+        with phase("resize"):
+            array_before, array_after = prepare_comparison_arrays(pil_before, pil_after, target_height)
 
-        if img1_aspect > img2_aspect:
-            new_width = image2.width
-            new_height = int(new_width / img1_aspect)
-        else:
-            new_height = image2.height
-            new_width = int(new_height * img1_aspect)
+        width = array_before.shape[1]
+        line_color = parse_slider_color(slider_color)
 
-        image1_resized = image1.resize((new_width, new_height), Image.LANCZOS)
-        paste_position = ((image2.width - new_width) // 2, (image2.height - new_height) // 2)
-        canvas.paste(image1_resized, paste_position)
+        # Divider schedule for the whole video. Consecutive frames often share a position
+        # (more frames than columns, or the slider parked at the end); those are
+        # synthesized once and handed to the encoder again.
+        num_frames = max(1, int(frame_rate * video_duration))
+        positions = slider_schedule(num_frames, width, video_duration, frame_rate, easing, subpixel)
+        tensor_before = torch.from_numpy(array_before)
+        tensor_after = torch.from_numpy(array_after)
 
-        return canvas
+        def render_position(position):
+            position = torch.tensor([position], dtype=torch.float64)
+            return render_frames_at(tensor_before, tensor_after, position, line_color, slider_thickness)[0].numpy()
 
-    def resize_image_to_height(self, image, target_height):
-        original_width, original_height = image.size
-        aspect_ratio = original_width / original_height
-        new_height = target_height
-        new_width = int(new_height * aspect_ratio)
-        return image.resize((new_width, new_height), Image.LANCZOS)
-
-    def create_comparison_video(self, image_before, image_after, video_duration, frame_rate, slider_color, slider_thickness, target_height, filename_prefix="slider_comparison"):
-        # Convert tensors to PIL images
-        # Handle batch of images - take the first one if multiple are provided
-        if len(image_before.shape) > 3 and image_before.shape[0] > 1:
-             print(f"Warning: SliderComparisonNode received batch of {image_before.shape[0]} images for 'before'. Using the first one.")
-        
-        if len(image_after.shape) > 3 and image_after.shape[0] > 1:
-             print(f"Warning: SliderComparisonNode received batch of {image_after.shape[0]} images for 'after'. Using the first one.")
-
-        # tensor2pil handles the conversion. If input is a batch, it might return a list or handle single. 
-        # The utils.py tensor2pil implementation:
-        # return Image.fromarray(np.clip(255. * img.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-        # It squeezes, so if batch size is 1 it works. If batch size > 1, squeeze might not do what we want if we pass the whole batch.
-        # Let's slice to be safe: image[0]
-        
-        pil_before = tensor2pil(image_before[0] if len(image_before.shape) > 3 else image_before)
-        pil_after = tensor2pil(image_after[0] if len(image_after.shape) > 3 else image_after)
-
-        # 1. Resize/Fit logic
-        # We want to match them. Let's assume image_after is the "reference" for aspect ratio/canvas if they differ,
-        # or we can just resize 'before' to match 'after'.
-        # The prompt says "resolution need to be matched so it is exact".
-        # Let's use the logic from main.py: resize_and_center_image(image1, image2)
-        
-        # Make sure they are RGB
-        pil_before = pil_before.convert("RGB")
-        pil_after = pil_after.convert("RGB")
-
-        # Resize before to match after's canvas
-        pil_before_fitted = self.resize_and_center_image(pil_before, pil_after)
-        
-        # Now resize both to target height
-        pil_before_final = self.resize_image_to_height(pil_before_fitted, target_height)
-        pil_after_final = self.resize_image_to_height(pil_after, target_height)
-
-        # Convert to numpy for processing
-        array_before = np.array(pil_before_final)
-        array_after = np.array(pil_after_final)
-        
-        width = array_before.shape[1]
-        num_frames = int(frame_rate * video_duration)
-        
-        # Parse slider color
-        try:
-            color_values = [int(c.strip()) for c in slider_color.split(',')]
-            if len(color_values) != 3:
-                raise ValueError
-            line_color = color_values
-        except:
-            print(f"Invalid slider color '{slider_color}', defaulting to red.")
-            line_color = [255, 0, 0]
+        frames = FrameReuse(render_position)
 
         def make_frame(t):
-            # Linear progress from 0 to 1 over the video duration
-            progress = t / video_duration
-            
-            # Calculate divider position (0 to width)
-            # Start (progress=0): divider at 0 (Show Before)
-            # End (progress=1): divider at width (Show After)
-            divider_position = int(progress * width)
-            
-            # Ensure divider stays within bounds
-            divider_position = max(0, min(width, divider_position))
-
-            # Start with the 'Before' image
-            frame = np.copy(array_before)
-            
-            # Reveal the 'After' image from the left as the slider moves right
-            if divider_position > 0:
-                frame[:, :divider_position] = array_after[:, :divider_position]
-
-            # Draw the slider line
-            if 0 <= divider_position < width:
-                # Ensure we don't go out of bounds with thickness
-                start = max(0, divider_position)
-                end = min(width, divider_position + slider_thickness)
-                frame[:, start:end] = line_color
-
-            return frame
+            # Start (t=0): divider at 0 (Show Before)
+            # End (t=duration): divider at width (Show After)
+            k = min(frame_index(t, frame_rate), num_frames - 1)
+            return frames.get(float(positions[k]))
 
-        # Generate video
-        # We can use MoviePy's VideoClip directly with make_frame, but main.py used ImageClip list.
-        # VideoClip is more memory efficient for long videos.
-        
-        # Note: make_frame in VideoClip expects t in seconds.
-        clip = VideoClip(make_frame, duration=video_duration)
-        
         # Save
         filename = f"{filename_prefix}_{os.urandom(4).hex()}.mp4"
         full_output_path = os.path.join(self.output_dir, filename)
-        
-        clip.write_videofile(full_output_path, fps=frame_rate, bitrate="5000k", codec="libx264", audio=False, logger=None)
-        
+        encode_video(make_frame, video_duration, frame_rate, full_output_path, async_encode)
+
         return (full_output_path,)
+
+
+class MultiSliderComparisonNode:
+    """
+    Compares several variants in a single video: either consecutive wipes A->B->C->...
+    or a grid where every variant is wiped against the first one with a shared slider.
+    All variants are fitted once and everything is rendered into one encode.
+    """
+
+    def __init__(self):
+        self.output_dir = folder_paths.get_output_directory()
+        self.type = "output"
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "images": ("IMAGE",),
+                "mode": (["sequential", "grid"], {"default": "sequential", "tooltip": "sequential: wipe A->B->C->..., grid: each variant against the first, side by side"}),
+                "video_duration": ("FLOAT", {"default": 10.0, "min": 1.0, "max": 600.0, "step": 0.1}),
+                "frame_rate": ("INT", {"default": 30, "min": 1, "max": 60, "step": 1}),
+                "slider_color": ("STRING", {"default": "255,0,0"}),
+                "slider_thickness": ("INT", {"default": 5, "min": 1, "max": 20, "step": 1}),
+                "target_height": ("INT", {"default": 1080, "min": 100, "max": 4096, "step": 1, "tooltip": "Height of one variant (one grid cell in grid mode)"}),
+                "filename_prefix": ("STRING", {"default": "multi_slider_comparison"}),
+            },
+            "optional": {
+                "async_encode": encode_queue.ASYNC_ENCODE_INPUT,
+            }
+        }
+
+    # Accepts one batch of same-size variants or a list of differently sized ones
+    INPUT_IS_LIST = True
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("video_path",)
+    FUNCTION = "create_multi_comparison_video"
+    CATEGORY = "Nimbus-Pack/Video"
+    OUTPUT_NODE = True
+
+    def create_multi_comparison_video(self, images, mode, video_duration, frame_rate, slider_color, slider_thickness,
+                                      target_height, filename_prefix, async_encode=(False,)):
+        mode, video_duration, frame_rate, slider_color = mode[0], video_duration[0], frame_rate[0], slider_color[0]
+        slider_thickness, target_height = slider_thickness[0], target_height[0]
+        filename_prefix, async_encode = filename_prefix[0], async_encode[0]
+
+        pil_images = [tensor2pil(image[i]).convert("RGB") for image in images for i in range(image.shape[0])]
+        if len(pil_images) < 2:
+            raise ValueError("MultiSliderComparisonNode needs at least two images")
+
+        with phase("resize"):
+            variants = fit_variants(pil_images, target_height)
+
+        line_color = parse_slider_color(slider_color)
+        height, width = variants[0].shape[:2]
+        num_frames = max(1, int(frame_rate * video_duration))
+
+        if mode == "grid":
+            # Reference against each other variant, one cell each, with a shared slider
+            cells = variants[1:]
+            columns = math.ceil(math.sqrt(len(cells)))
+            rows = math.ceil(len(cells) / columns)
+            positions = divider_positions(num_frames, width, video_duration, frame_rate)
+            grid = torch.zeros((rows * height, columns * width, 3), dtype=torch.uint8)
+
+            def render_grid(position):
+                position = torch.tensor([position])
+                for i, variant in enumerate(cells):
+                    y, x = (i // columns) * height, (i % columns) * width
+                    grid[y:y + height, x:x + width] = render_frames(variants[0], variant, position, line_color, slider_thickness)[0]
+                return grid.numpy()
+
+            frames = FrameReuse(render_grid)
+
+            def make_frame(t):
+                k = min(frame_index(t, frame_rate), num_frames - 1)
+                return frames.get(int(positions[k]))
+        else:
+            segments, positions = sequential_schedule(num_frames, len(variants) - 1, width)
+
+            def render_wipe(key):
+                segment, position = key
+                return render_frames(variants[segment], variants[segment + 1], torch.tensor([position]), line_color, slider_thickness)[0].numpy()
+
+            frames = FrameReuse(render_wipe)
+
+            def make_frame(t):
+                k = min(frame_index(t, frame_rate), num_frames - 1)
+                return frames.get((int(segments[k]), int(positions[k])))
+
+        filename = f"{filename_prefix}_{os.urandom(4).hex()}.mp4"
+        full_output_path = os.path.join(self.output_dir, filename)
+        encode_video(make_frame, video_duration, frame_rate, full_output_path, async_encode)
+
+        return (full_output_path,)
+
+
+class VideoEncodeWaitNode:
+    """
+    Blocks until a background encode (async_encode) has finished and passes its path on.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "video_path": ("STRING", {"forceInput": True}),
+                "timeout": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 86400.0, "step": 1.0, "tooltip": "Seconds to wait, 0 waits without limit"}),
+            }
+        }
+
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("video_path",)
+    FUNCTION = "wait_for_video"
+    CATEGORY = "Nimbus-Pack/Video"
+
+    def wait_for_video(self, video_path, timeout=0.0):
+        status = encode_queue.wait_for(video_path, timeout if timeout > 0 else None)
+        if status != encode_queue.DONE:
+            raise RuntimeError(f"Video encode for {video_path} is {status}")
+        return (video_path,)
+
+
+class SliderComparisonFramesNode:
+    """
+    Builds the slider comparison animation as an IMAGE batch instead of a video file,
+    so the frames can be fed into other nodes.
+    """
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "image_before": ("IMAGE",),
+                "image_after": ("IMAGE",),
+                "video_duration": ("FLOAT", {"default": 10.0, "min": 1.0, "max": 60.0, "step": 0.1}),
+                "frame_rate": ("INT", {"default": 30, "min": 1, "max": 60, "step": 1}),
+                "slider_color": ("STRING", {"default": "255,0,0"}),
+                "slider_thickness": ("INT", {"default": 5, "min": 1, "max": 20, "step": 1}),
+                "target_height": ("INT", {"default": 1080, "min": 100, "max": 4096, "step": 1}),
+            },
+            "optional": {
+                "frames_per_chunk": ("INT", {"default": 0, "min": 0, "max": 3600, "step": 1, "tooltip": "Frames synthesized per pass, bounds the temporary memory for long durations. 0 renders all frames in one pass"}),
+                "precision": CREATED_PRECISION_INPUT,
+                "easing": EASING_INPUT,
+                "subpixel": SUBPIXEL_INPUT,
+            }
+        }
+
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("frames",)
+    FUNCTION = "create_comparison_frames"
+    CATEGORY = "Nimbus-Pack/Video"
+
+    def create_comparison_frames(self, image_before, image_after, video_duration, frame_rate, slider_color, slider_thickness,
+                                 target_height, frames_per_chunk=0, precision="float32", easing="linear", subpixel=False):
+        pil_before = first_image(image_before, "before")
+        pil_after = first_image(image_after, "after")
+
+        with phase("resize"):
+            array_before, array_after = prepare_comparison_arrays(pil_before, pil_after, target_height)
+
+        tensor_before = torch.from_numpy(array_before)
+        tensor_after = torch.from_numpy(array_after)
+        line_color = parse_slider_color(slider_color)
+
+        height, width = array_before.shape[:2]
+        positions = slider_schedule(int(frame_rate * video_duration), width, video_duration, frame_rate, easing, subpixel)
+        num_frames = positions.shape[0]
+
+        # Frames are synthesized in uint8, once per distinct position, and written straight
+        # into the output in its precision
+        step = frames_per_chunk if frames_per_chunk > 0 else max(1, num_frames)
+        frames = torch.empty((num_frames, height, width, 3), dtype=PRECISIONS[precision])
+        for start in range(0, num_frames, step):
+            end = min(start + step, num_frames)
+            chunk = render_unique_frames(tensor_before, tensor_after, positions[start:end], line_color, slider_thickness)
+            frames[start:end] = to_precision(chunk, precision)
+
+        return (frames,)
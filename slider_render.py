@@ -0,0 +1,249 @@
+from PIL import Image
+import torch
+import numpy as np
+
+from .utils import tensor2pil
+
+# Slider motion curves
+EASINGS = ["linear", "ease-in-out"]
+
+# Optional inputs shared by the slider nodes
+EASING_INPUT = (EASINGS, {"default": "linear", "tooltip": "Slider motion curve"})
+SUBPIXEL_INPUT = ("BOOLEAN", {"default": False, "tooltip": "Move the slider in quarter-pixel steps with an anti-aliased edge"})
+
+# Sub-pixel slider positions are quantized to this fraction of a column, so frames
+# with the same quantized position can still be reused
+SUBPIXEL_STEPS = 4
+
+
+def first_image(image, label):
+    """PIL image of the first frame of an IMAGE batch, warning if more were given."""
+    if len(image.shape) > 3 and image.shape[0] > 1:
+        print(f"Warning: SliderComparisonNode received batch of {image.shape[0]} images for '{label}'. Using the first one.")
+    # tensor2pil squeezes, so slice the batch dimension away first
+    return tensor2pil(image[0] if len(image.shape) > 3 else image).convert("RGB")
+
+
+def parse_slider_color(slider_color):
+    try:
+        color_values = [int(c.strip()) for c in slider_color.split(',')]
+        if len(color_values) != 3:
+            raise ValueError
+        return color_values
+    except:
+        print(f"Invalid slider color '{slider_color}', defaulting to red.")
+        return [255, 0, 0]
+
+
+def resize_and_center_image(image1, image2, background_color=(0, 0, 0)):
+    """
+    Resize image1 to fit within the resolution of image2 while maintaining its aspect ratio,
+    and paste it centered onto a canvas of the same resolution as image2.
+    """
+    canvas = Image.new("RGB", image2.size, color=background_color)
+
+    img1_aspect = image1.width / image1.height
+    img2_aspect = image2.width / image2.height
+
+    if img1_aspect > img2_aspect:
+        new_width = image2.width
+        new_height = int(new_width / img1_aspect)
+    else:
+        new_height = image2.height
+        new_width = int(new_height * img1_aspect)
+
+    image1_resized = image1.resize((new_width, new_height), Image.LANCZOS)
+    paste_position = ((image2.width - new_width) // 2, (image2.height - new_height) // 2)
+    canvas.paste(image1_resized, paste_position)
+
+    return canvas
+
+
+def resize_image_to_height(image, target_height):
+    original_width, original_height = image.size
+    aspect_ratio = original_width / original_height
+    new_height = target_height
+    new_width = int(new_height * aspect_ratio)
+    return image.resize((new_width, new_height), Image.LANCZOS)
+
+
+def comparison_geometry(before_size, after_size, target_height):
+    """
+    Compose "fit before onto after's canvas" and "scale the canvas to target_height"
+    into one step. Returns the final canvas size and the size and position of
+    "before" letterboxed on it, so each input is resampled only once.
+    The standalone main.py script repeats this in fit_images_to_height.
+    """
+    after_width, after_height = after_size
+    before_width, before_height = before_size
+
+    # The canvas is "after" scaled to the target height
+    canvas_size = (int(target_height * after_width / after_height), target_height)
+
+    before_aspect = before_width / before_height
+    if before_aspect > after_width / after_height:
+        # Before is wider than the canvas, fit the width
+        fitted_size = (canvas_size[0], int(canvas_size[0] / before_aspect))
+    else:
+        fitted_size = (int(canvas_size[1] * before_aspect), canvas_size[1])
+    fitted_size = (max(1, fitted_size[0]), max(1, fitted_size[1]))
+
+    position = ((canvas_size[0] - fitted_size[0]) // 2, (canvas_size[1] - fitted_size[1]) // 2)
+    return canvas_size, fitted_size, position
+
+
+def fit_to_canvas(image, size, canvas_size, position, background_color=(0, 0, 0)):
+    """Resample image once to size (skipped when it already matches) and letterbox it on the canvas."""
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    if size == canvas_size:
+        return image
+    canvas = Image.new("RGB", canvas_size, color=background_color)
+    canvas.paste(image, position)
+    return canvas
+
+
+def prepare_comparison_arrays(pil_before, pil_after, target_height):
+    """
+    Fit "before" onto the canvas of "after" scaled to target_height, resampling each
+    input exactly once. Returns two uint8 arrays [H, W, 3] of the same size.
+    """
+    canvas_size, fitted_size, position = comparison_geometry(pil_before.size, pil_after.size, target_height)
+
+    pil_before_final = fit_to_canvas(pil_before, fitted_size, canvas_size, position)
+    pil_after_final = fit_to_canvas(pil_after, canvas_size, canvas_size, (0, 0))
+
+    return np.array(pil_before_final), np.array(pil_after_final)
+
+
+def fit_variants(pil_images, target_height):
+    """
+    Fit every image once onto the canvas of the first one scaled to target_height.
+    Returns uint8 tensors [H, W, 3] of the same size, in input order.
+    """
+    reference = pil_images[0]
+    fitted = []
+    for image in pil_images:
+        canvas_size, fitted_size, position = comparison_geometry(image.size, reference.size, target_height)
+        fitted.append(torch.from_numpy(np.array(fit_to_canvas(image, fitted_size, canvas_size, position))))
+    return fitted
+
+
+def frame_index(t, frame_rate):
+    """Frame number moviepy is asking for at time t."""
+    return int(round(t * frame_rate))
+
+
+def sequential_schedule(num_frames, num_segments, width):
+    """
+    Segment and divider column of every frame for consecutive wipes A->B, B->C, ...
+    Each wipe gets an equal share of the frames. Returns two int64 [F] tensors.
+    """
+    frames_per_segment = num_frames / num_segments
+    k = torch.arange(num_frames, dtype=torch.float64)
+    segments = (k / frames_per_segment).to(torch.int64).clamp(0, num_segments - 1)
+    progress = (k - segments * frames_per_segment) / frames_per_segment
+    return segments, (progress * width).to(torch.int64).clamp(0, width)
+
+
+def divider_positions(num_frames, width, video_duration, frame_rate):
+    """
+    Divider column of every frame: moves linearly from 0 (all "before") to width (all "after").
+    Frame k is shown at t = k / frame_rate, like moviepy does when encoding.
+    """
+    t = torch.arange(num_frames, dtype=torch.float64) / frame_rate
+    progress = t / video_duration
+    return (progress * width).to(torch.int64).clamp(0, width)
+
+
+def render_frames(array_before, array_after, positions, line_color, slider_thickness):
+    """
+    Build all frames for the given divider positions in one vectorized pass.
+
+    Each frame picks "after" left of its divider and "before" right of it, then the
+    slider stripe [position, position + thickness) is drawn on top. array_before and
+    array_after are uint8 [H, W, C] tensors of the same size, positions is an int64 [F] tensor.
+    Returns [F, H, W, C].
+    """
+    width = array_before.shape[1]
+    positions = positions.to(array_before.device).view(-1, 1)
+    columns = torch.arange(width, device=array_before.device).view(1, -1)
+
+    # [F, W] column masks, broadcast over rows and channels
+    reveal = (columns < positions)[:, None, :, None]
+    stripe = ((columns >= positions) & (columns < positions + slider_thickness) & (positions < width))[:, None, :, None]
+
+    color = torch.tensor(line_color, dtype=array_before.dtype, device=array_before.device)
+    frames = torch.where(reveal, array_after.unsqueeze(0), array_before.unsqueeze(0))
+    return torch.where(stripe, color, frames)
+
+
+def ease(progress, easing):
+    if easing == "ease-in-out":
+        # Smoothstep: starts and ends slowly
+        return progress * progress * (3.0 - 2.0 * progress)
+    return progress
+
+
+def slider_schedule(num_frames, width, video_duration, frame_rate, easing="linear", subpixel=False):
+    """
+    Divider position of every frame as a float64 [F] tensor. Linear whole-column motion
+    matches divider_positions. With subpixel, positions are kept to 1/SUBPIXEL_STEPS column.
+    """
+    t = torch.arange(num_frames, dtype=torch.float64) / frame_rate
+    progress = ease((t / video_duration).clamp(0.0, 1.0), easing)
+    steps = SUBPIXEL_STEPS if subpixel else 1
+    return (torch.floor(progress * width * steps) / steps).clamp(0, width)
+
+
+def render_frames_at(array_before, array_after, positions, line_color, slider_thickness):
+    """
+    render_frames for float divider positions. A fractional position is drawn as the
+    blend of the two neighbouring whole-column frames, which anti-aliases both the
+    divider and the stripe.
+    """
+    lower = torch.floor(positions).to(torch.int64)
+    fraction = (positions - lower).to(torch.float32)
+    frames = render_frames(array_before, array_after, lower, line_color, slider_thickness)
+
+    blended = (fraction > 0).nonzero().squeeze(1)
+    if blended.numel() > 0:
+        upper = render_frames(array_before, array_after, lower[blended] + 1, line_color, slider_thickness)
+        weight = fraction[blended].view(-1, 1, 1, 1).to(frames.device)
+        mixed = frames[blended].to(torch.float32) * (1.0 - weight) + upper.to(torch.float32) * weight
+        frames[blended] = mixed.round_().to(frames.dtype)
+    return frames
+
+
+def render_unique_frames(array_before, array_after, positions, line_color, slider_thickness):
+    """
+    render_frames_at that synthesizes each run of identical consecutive positions once
+    and repeats it by indexing.
+    """
+    unique_positions, inverse = torch.unique_consecutive(positions, return_inverse=True)
+    frames = render_frames_at(array_before, array_after, unique_positions, line_color, slider_thickness)
+    if unique_positions.shape[0] == positions.shape[0]:
+        return frames
+    return frames[inverse.to(frames.device)]
+
+
+class FrameReuse:
+    """
+    Frame source for the encoder that only synthesizes a frame when its key changes.
+    moviepy asks for frames in order, so repeats are handed back as the same array.
+    """
+
+    def __init__(self, render):
+        self.render = render
+        self.key = None
+        self.frame = None
+        self.rendered = 0
+        self.requested = 0
+
+    def get(self, key):
+        self.requested += 1
+        if self.frame is None or key != self.key:
+            self.frame = self.render(key)
+            self.key = key
+            self.rendered += 1
+        return self.frame
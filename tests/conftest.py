@@ -0,0 +1,18 @@
+"""
+Imports the pack as the ``nimbus_pack`` package from the repository root without running
+its ``__init__`` (which installs dependencies and needs ComfyUI), with the ``folder_paths``
+stand-in from ``benchmarks`` in place of ComfyUI's module.
+"""
+import os
+import sys
+import types
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TESTS_DIR)
+PACKAGE = "nimbus_pack"
+
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [REPO_ROOT]
+    sys.modules[PACKAGE] = package
@@ -0,0 +1,138 @@
+"""
+The image nodes must not move image data off the input's device. Their accelerator
+paths are forced on CPU by treating no tensor as host-resident, and every call that
+would be a device transfer (``.cpu()``, ``.cuda()``, ``.numpy()``, ``.to(<device>)``) is
+counted.
+"""
+import importlib
+
+import numpy as np
+import pytest
+import torch
+
+utils = importlib.import_module("nimbus_pack.utils")
+auto_levels_node = importlib.import_module("nimbus_pack.auto_levels_node")
+image_fit_resize_node = importlib.import_module("nimbus_pack.image_fit_resize_node")
+image_fitting_node = importlib.import_module("nimbus_pack.image_fitting_node")
+image_patch_nodes = importlib.import_module("nimbus_pack.image_patch_nodes")
+
+
+def _targets_device(args, kwargs):
+    if "device" in kwargs:
+        return True
+    return any(isinstance(arg, (torch.device, str, torch.Tensor)) for arg in args)
+
+
+@pytest.fixture
+def transfers(monkeypatch):
+    """Counts device transfers while the torch paths are used for CPU tensors."""
+    counts = {"cpu": 0, "cuda": 0, "numpy": 0, "to": 0}
+    original_cpu, original_numpy, original_to = torch.Tensor.cpu, torch.Tensor.numpy, torch.Tensor.to
+
+    def counting_cpu(self, *args, **kwargs):
+        counts["cpu"] += 1
+        return original_cpu(self, *args, **kwargs)
+
+    def counting_cuda(self, *args, **kwargs):
+        counts["cuda"] += 1
+        return self
+
+    def counting_numpy(self, *args, **kwargs):
+        counts["numpy"] += 1
+        return original_numpy(self, *args, **kwargs)
+
+    def counting_to(self, *args, **kwargs):
+        if _targets_device(args, kwargs):
+            counts["to"] += 1
+        return original_to(self, *args, **kwargs)
+
+    monkeypatch.setattr(torch.Tensor, "cpu", counting_cpu)
+    monkeypatch.setattr(torch.Tensor, "cuda", counting_cuda)
+    monkeypatch.setattr(torch.Tensor, "numpy", counting_numpy)
+    monkeypatch.setattr(torch.Tensor, "to", counting_to)
+    monkeypatch.setattr(utils, "on_host", lambda images: False)
+    return counts
+
+
+def random_images(batch=2, height=48, width=80, channels=3, precision="float32"):
+    generator = torch.Generator().manual_seed(0)
+    images = torch.rand((batch, height, width, channels), generator=generator)
+    return utils.to_precision(images, precision)
+
+
+def assert_no_transfers(counts):
+    assert counts == {"cpu": 0, "cuda": 0, "numpy": 0, "to": 0}
+
+
+@pytest.mark.parametrize("channel_independent", [True, False])
+@pytest.mark.parametrize("precision", ["float32", "uint8"])
+def test_auto_levels_stays_on_device(transfers, channel_independent, precision):
+    image = random_images(precision=precision)
+    (result,) = auto_levels_node.AutoLevelsNode().apply_auto_levels(image, 1.0, 99.0, channel_independent)
+    assert_no_transfers(transfers)
+    assert result.device == image.device and result.dtype == image.dtype
+
+
+@pytest.mark.parametrize("resampling", ["nearest", "bilinear", "bicubic", "lanczos"])
+@pytest.mark.parametrize("supersample", ["false", "true"])
+def test_resize_and_crop_stays_on_device(transfers, resampling, supersample):
+    image = random_images()
+    node = image_fit_resize_node.ImageResizeAndCropNode()
+    (result,) = node.image_resize_and_crop(image, 32, 40, "center", resampling, supersample)
+    assert_no_transfers(transfers)
+    assert result.shape == (2, 40, 32, 3) and result.device == image.device
+
+
+@pytest.mark.parametrize("resampling", ["nearest", "bilinear", "bicubic", "lanczos"])
+@pytest.mark.parametrize("fitting_mode", ["none", "center"])
+def test_square_adapter_stays_on_device(transfers, resampling, fitting_mode):
+    image = random_images(precision="float16")
+    node = image_fitting_node.ImageSquareAdapterNode()
+    (result,) = node.image_fit_in_square(image, 64, "255,255,255", resampling, "false", fitting_mode)
+    assert_no_transfers(transfers)
+    assert result.shape == (2, 64, 64, 3) and result.dtype == torch.float16
+
+
+def test_patch_nodes_stay_on_device(transfers):
+    image = random_images()
+    (rect,) = image_patch_nodes.ImageExtractRect().extract_rect(image, 16, 16, "bottom-right")
+    image_patch_nodes.ImageCombineRect().combine_rect(image, rect, "top-left")
+    assert_no_transfers(transfers)
+
+
+def test_pil_path_is_counted(transfers):
+    # The host path converts to PIL, which the counter has to notice
+    node = image_fit_resize_node.ImageResizeAndCropNode()
+    node.apply_resize_and_crop(utils.tensor2pil(random_images()[0]), 32, 40, "center", "lanczos", "false")
+    assert transfers["cpu"] > 0
+
+
+@pytest.mark.parametrize("resampling", ["nearest", "bilinear", "bicubic", "lanczos"])
+@pytest.mark.parametrize("size", [(300, 120), (50, 37)])
+def test_resize_tensor_matches_pil(resampling, size):
+    image = random_images(batch=1, height=61, width=173, precision="uint8")
+    expected = utils.pil2tensor(utils.tensor2pil(image[0]).resize(size, resample=utils.RESAMPLE_FILTERS[resampling]))
+    result = utils.resize_tensor(image, size[0], size[1], resampling)
+    # PIL rounds to 8 bits after each pass
+    assert (expected - result).abs().max().item() <= 1.5 / 255
+
+
+@pytest.mark.parametrize("resampling", ["nearest", "bilinear", "bicubic", "lanczos"])
+@pytest.mark.parametrize("alignment", ["center", "right-bottom"])
+def test_device_path_matches_host_path(monkeypatch, resampling, alignment):
+    image = random_images(height=61, width=173, precision="uint8")
+    node = image_fit_resize_node.ImageResizeAndCropNode()
+    (host,) = node.image_resize_and_crop(image, 50, 37, alignment, resampling, "false", "float32")
+    monkeypatch.setattr(utils, "on_host", lambda images: False)
+    (device,) = node.image_resize_and_crop(image, 50, 37, alignment, resampling, "false", "float32")
+    # PIL rounds to 8 bits after each pass
+    assert (host - device).abs().max().item() <= 1.5 / 255
+
+
+def test_device_percentile_matches_numpy(monkeypatch):
+    values = random_images(batch=3).reshape(3, -1)
+    expected = np.percentile(values.numpy(), (1.0, 99.0), axis=1)
+    monkeypatch.setattr(utils, "on_host", lambda images: False)
+    low, high = utils.percentile(values, (1.0, 99.0), dim=1)
+    assert np.allclose(low.numpy(), expected[0], atol=1e-6)
+    assert np.allclose(high.numpy(), expected[1], atol=1e-6)
@@ -0,0 +1,36 @@
+"""
+Background encodes are tracked in memory only until they finish; afterwards their
+status comes from the file system.
+"""
+import importlib
+
+encode_queue = importlib.import_module("nimbus_pack.encode_queue")
+
+
+def _write(path):
+    with open(path, "w") as f:
+        f.write("video")
+
+
+def _fail(path):
+    raise RuntimeError("encoder crashed")
+
+
+def test_finished_jobs_are_forgotten(tmp_path):
+    paths = [str(tmp_path / f"clip_{i}.mp4") for i in range(6)]
+    for path in paths:
+        encode_queue.submit(path, _write)
+    for path in paths:
+        assert encode_queue.wait_for(path, timeout=10) == encode_queue.DONE
+    assert not any(path in encode_queue._jobs for path in paths)
+    assert all(encode_queue.job_status(path) == encode_queue.DONE for path in paths)
+
+
+def test_failed_jobs_are_reported_from_the_error_file(tmp_path):
+    path = str(tmp_path / "broken.mp4")
+    job = encode_queue.submit(path, _fail)
+    assert encode_queue.wait_for(path, timeout=10) == encode_queue.FAILED
+    assert path not in encode_queue._jobs
+    assert encode_queue.job_status(path) == encode_queue.FAILED
+    with open(encode_queue.error_path(path)) as f:
+        assert f.read().strip() == job.error
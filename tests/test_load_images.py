@@ -0,0 +1,88 @@
+"""
+Incremental mode of LoadImagesFromFolder: the cursor, max_per_run, deleted files and
+runs without new files.
+"""
+import importlib
+import json
+import os
+
+import pytest
+from PIL import Image
+
+load_images_node = importlib.import_module("nimbus_pack.load_images_node")
+
+
+class Blocker:
+    def __init__(self, message):
+        self.message = message
+
+
+@pytest.fixture
+def folder(tmp_path):
+    for name in ("a.png", "b.png", "c.png"):
+        Image.new("RGB", (4, 3), (10, 20, 30)).save(tmp_path / name)
+    return tmp_path
+
+
+def _load(folder, **kwargs):
+    return load_images_node.LoadImagesFromFolder().load_images(str(folder), incremental=True, **kwargs)
+
+
+def _cursor(folder):
+    with open(folder / load_images_node.LoadImagesFromFolder.CURSOR_FILE_NAME) as f:
+        return json.load(f)
+
+
+def test_only_new_or_changed_files_are_loaded(folder, monkeypatch):
+    monkeypatch.setattr(load_images_node, "ExecutionBlocker", Blocker)
+    images, masks = _load(folder)
+    assert len(images) == len(masks) == 3
+    assert sorted(_cursor(folder)) == ["a.png", "b.png", "c.png"]
+
+    Image.new("RGB", (5, 3)).save(folder / "b.png")
+    Image.new("RGB", (4, 3)).save(folder / "d.png")
+    images, _ = _load(folder)
+    assert [image.shape[2] for image in images] == [5, 4]
+
+
+def test_max_per_run_caps_each_run(folder, monkeypatch):
+    monkeypatch.setattr(load_images_node, "ExecutionBlocker", Blocker)
+    assert len(_load(folder, max_per_run=2)[0]) == 2
+    assert sorted(_cursor(folder)) == ["a.png", "b.png"]
+    assert len(_load(folder, max_per_run=2)[0]) == 1
+
+
+def test_deleted_files_are_forgotten(folder, monkeypatch):
+    monkeypatch.setattr(load_images_node, "ExecutionBlocker", Blocker)
+    _load(folder)
+    os.remove(folder / "b.png")
+    _load(folder)
+    assert sorted(_cursor(folder)) == ["a.png", "c.png"]
+
+    # A file that reappears with the same name is new again
+    Image.new("RGB", (4, 3)).save(folder / "b.png")
+    assert len(_load(folder)[0]) == 1
+
+
+def test_no_new_files_blocks_downstream(folder, monkeypatch):
+    monkeypatch.setattr(load_images_node, "ExecutionBlocker", Blocker)
+    _load(folder)
+    images, masks = _load(folder)
+    assert len(images) == len(masks) == 1
+    assert isinstance(images[0], Blocker) and isinstance(masks[0], Blocker)
+
+
+def test_no_new_files_without_execution_blocking_raises(folder, monkeypatch):
+    monkeypatch.setattr(load_images_node, "ExecutionBlocker", None)
+    _load(folder)
+    with pytest.raises(ValueError):
+        _load(folder)
+
+
+def test_cursor_file_overrides_the_folder_cursor(folder, tmp_path_factory, monkeypatch):
+    monkeypatch.setattr(load_images_node, "ExecutionBlocker", Blocker)
+    cursor_path = tmp_path_factory.mktemp("cursor") / "seen.json"
+    _load(folder, cursor_file=str(cursor_path))
+    assert cursor_path.is_file()
+    assert not (folder / load_images_node.LoadImagesFromFolder.CURSOR_FILE_NAME).exists()
+    assert isinstance(_load(folder, cursor_file=str(cursor_path))[0][0], Blocker)
@@ -0,0 +1,55 @@
+"""
+Memoization keys on argument content after binding to the node's signature, and never
+hashes tensors that live off the host.
+"""
+import importlib
+
+import torch
+
+memoize = importlib.import_module("nimbus_pack.memoize")
+
+
+class CountingNode:
+    FUNCTION = "run"
+
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, image, strength=1.0, mode="fast"):
+        self.calls += 1
+        return (image * strength,)
+
+
+def _memoized_node():
+    cls = type("CountingNode", (CountingNode,), {})
+    cache = memoize.MemoCache(64 * 1024 * 1024)
+    memoize.memoize_node("CountingNode", cls, cache)
+    return cls(), cache
+
+
+def test_positional_keyword_and_default_arguments_share_an_entry():
+    node, cache = _memoized_node()
+    image = torch.rand(1, 8, 8, 3)
+    node.run(image)
+    node.run(image, 1.0)
+    node.run(image=image.clone(), mode="fast")
+    node.run(image, strength=1.0, mode="fast")
+    assert node.calls == 1
+    assert cache.hits == 3 and len(cache.entries) == 1
+
+    node.run(image, 0.5)
+    assert node.calls == 2
+
+
+def test_device_tensors_are_not_hashed(monkeypatch):
+    node, cache = _memoized_node()
+
+    def no_digest(tensor):
+        raise AssertionError("device tensor hashed")
+
+    monkeypatch.setattr(memoize, "tensor_digest", no_digest)
+    image = torch.empty(1, 8, 8, 3, device="meta")
+    node.run(image)
+    node.run(image)
+    assert node.calls == 2
+    assert len(cache.entries) == 0 and cache.hits == cache.misses == 0
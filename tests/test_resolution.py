@@ -0,0 +1,53 @@
+"""
+Stage planning of MultiStageUpscalePlanner: aligned intermediates never overshoot the
+next stage and no stage is a no-op.
+"""
+import importlib
+import json
+
+resolution = importlib.import_module("nimbus_pack.resolution")
+
+
+def _plan(width, height, alignment, factor, max_stage_factor=2.0):
+    return resolution.MultiStageUpscalePlanner().plan_upscale(width, height, alignment, factor, max_stage_factor,
+                                                              4096, 48, 64)
+
+
+def test_regular_plan_doubles_each_stage():
+    sizes, stage_factor = resolution.upscale_stage_sizes(7680, 4320, 16, 4.0, 2.0)
+    assert sizes == [(1920, 1088), (3840, 2160), (7680, 4320)]
+    assert stage_factor == 2.0
+
+
+def test_alignment_never_exceeds_the_final_size():
+    generation_width, generation_height, stage_count, stage_factor, plan = _plan(33, 17, 64, 2.0)
+    assert (generation_width, generation_height) == (33, 17)
+    assert stage_count == 0 and stage_factor == 1.0
+    assert json.loads(plan)["stage_count"] == 0
+
+
+def test_no_op_stages_are_dropped():
+    sizes, _ = resolution.upscale_stage_sizes(1, 1, 16, 64.0, 2.0)
+    assert sizes == [(1, 1)]
+
+    for width, height, alignment, factor in [(100, 60, 64, 8.0), (1000, 333, 64, 10.0), (7680, 4320, 16, 4.0)]:
+        _, _, stage_count, _, plan = _plan(width, height, alignment, factor)
+        stages = json.loads(plan)["stages"]
+        assert stage_count == len(stages) - 1
+        for previous, stage in zip(stages, stages[1:]):
+            assert stage["width"] >= previous["width"] and stage["height"] >= previous["height"]
+            assert (stage["width"], stage["height"]) != (previous["width"], previous["height"])
+
+
+def test_aligned_steps_stay_within_the_cap():
+    for width, height, alignment, factor, max_stage_factor in [(1920, 1080, 64, 6.0, 2.5), (237, 133, 16, 8.0, 2.0),
+                                                               (7680, 4320, 16, 4.0, 2.0), (4096, 2304, 64, 10.0, 1.5)]:
+        sizes, stage_factor = resolution.upscale_stage_sizes(width, height, alignment, factor, max_stage_factor)
+        steps = [resolution.step_factor(size, next_size) for size, next_size in zip(sizes, sizes[1:])]
+        assert max(steps) <= max_stage_factor + 1e-9
+        assert stage_factor == max(steps)
+
+    _, _, stage_count, stage_factor, plan = _plan(1920, 1080, 64, 6.0, 2.5)
+    stages = json.loads(plan)["stages"]
+    assert stage_count == len(stages) - 1 == 3
+    assert stage_factor <= 2.5 and all(stage["factor"] <= 2.5 for stage in stages)
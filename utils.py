@@ -1,14 +1,102 @@
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 from PIL import Image
 import torch
+import torch.nn.functional as F
 import numpy as np
 
+# PIL resampling filters by node option name
+RESAMPLE_FILTERS = {
+    'nearest': Image.NEAREST,
+    'bilinear': Image.BILINEAR,
+    'bicubic': Image.BICUBIC,
+    'lanczos': Image.LANCZOS
+}
+
+# Resampling options that run in torch (sampling like PIL) for tensors on an accelerator.
+# CPU tensors use PIL directly.
+TORCH_RESAMPLE_MODES = ('nearest', 'bilinear', 'bicubic', 'lanczos')
+
+# Working memory budget for chunked batch processing, NIMBUS_CHUNK_BUDGET_MB overrides it
+DEFAULT_CHUNK_BUDGET_MB = 1024
+
+# Worker threads for the per-frame PIL paths, NIMBUS_THREADS overrides it
+DEFAULT_MAX_WORKERS = 8
+
+# Image tensor precisions. float32/float16 hold values in [0, 1], uint8 holds [0, 255].
+PRECISIONS = {
+    'float32': torch.float32,
+    'float16': torch.float16,
+    'uint8': torch.uint8,
+}
+
+# Node option for the output precision, "auto" keeps the input's precision
+PRECISION_OPTIONS = ["auto", "float32", "float16", "uint8"]
+
+# Optional "precision" input of the nodes that transform images
+PRECISION_INPUT = (PRECISION_OPTIONS, {"default": "auto", "tooltip": "Output precision, auto keeps the input's. uint8/float16 use 4x/2x less memory than float32"})
+# Optional "precision" input of the nodes that create images (loaded or rendered)
+CREATED_PRECISION_INPUT = (list(PRECISIONS), {"default": "float32", "tooltip": "uint8/float16 use 4x/2x less memory than float32"})
+
 # Tensor to PIL
 def tensor2pil(img):
+    if img.dtype == torch.uint8:
+        return Image.fromarray(img.cpu().numpy().squeeze())
     return Image.fromarray(np.clip(255. * img.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
 
 # PIL to Tensor
-def pil2tensor(img):
-    return torch.from_numpy(np.array(img).astype(np.float32) / 255.0).unsqueeze(0)
+def pil2tensor(img, precision='float32'):
+    return torch.from_numpy(array_to_precision(np.array(img), precision)).unsqueeze(0)
+
+def array_to_precision(array, precision):
+    """Convert an 8-bit numpy image to the given precision without a float32 detour."""
+    if precision == 'uint8':
+        return array
+    if precision == 'float16':
+        return array.astype(np.float16) / np.float16(255)
+    return array.astype(np.float32) / 255.0
+
+def image_precision(images):
+    """Precision name of an image tensor."""
+    if images.dtype == torch.uint8:
+        return 'uint8'
+    if images.dtype == torch.float16:
+        return 'float16'
+    return 'float32'
+
+def resolve_precision(precision, images):
+    """Resolve the "auto" node option to the precision of the input images."""
+    return image_precision(images) if precision == 'auto' else precision
+
+def to_float(images, dtype=torch.float32):
+    """Image tensor of any precision as floats in [0, 1], for computation."""
+    if images.dtype == torch.uint8:
+        return images.to(dtype) / 255.0
+    return images.to(dtype)
+
+def to_precision(images, precision):
+    """Convert an image tensor of any precision to the given precision."""
+    dtype = PRECISIONS[precision]
+    if images.dtype == dtype:
+        return images
+    if dtype == torch.uint8:
+        return (to_float(images) * 255.0).round_().clamp_(0, 255).to(torch.uint8)
+    return to_float(images, dtype)
+
+def on_host(images):
+    """True for CPU tensors, which numpy and PIL read without a device transfer."""
+    return images.device.type == 'cpu'
+
+def resample_on_device(resampling, images):
+    """
+    True when images should be resampled in torch on their own device: on an accelerator,
+    for every torch resampling mode. CPU tensors go through PIL, which is faster there and
+    needs no transfer.
+    """
+    return resampling in TORCH_RESAMPLE_MODES and not on_host(images)
 
 def round_up_to_divisible_by_eight(value):
         return ((value + 7) // 8) * 8
@@ -19,3 +107,239 @@ def align_int_value(value, alignment):
 def clamp(value, min_value, max_value):
     """Ensure value falls within the range [min_value, max_value]."""
     return max(min_value, min(value, max_value))
+
+def _bilinear_kernel(x):
+    x = np.abs(x)
+    return np.where(x < 1.0, 1.0 - x, 0.0)
+
+def _bicubic_kernel(x):
+    # Keys cubic with a = -0.5, like PIL (torch's bicubic uses a = -0.75)
+    a = -0.5
+    x = np.abs(x)
+    return np.where(x < 1.0, ((a + 2.0) * x - (a + 3.0)) * x * x + 1,
+                    np.where(x < 2.0, (((x - 5) * x + 8) * x - 4) * a, 0.0))
+
+def _lanczos_kernel(x):
+    return np.where((x >= -3.0) & (x < 3.0), np.sinc(x) * np.sinc(x / 3.0), 0.0)
+
+# Filter support (in source pixels at scale 1) and kernel of PIL's resampling filters
+RESAMPLE_KERNELS = {
+    'bilinear': (1.0, _bilinear_kernel),
+    'bicubic': (2.0, _bicubic_kernel),
+    'lanczos': (3.0, _lanczos_kernel),
+}
+
+def resample_coefficients(in_size, out_size, resampling):
+    """
+    Source indices and normalized weights ([out_size, taps] numpy arrays) for resampling
+    an axis of in_size pixels to out_size pixels. Follows PIL's Resample.c (and its
+    nearest-neighbour scaling) in double precision, so the same source pixels are picked
+    and weighted.
+    """
+    scale = in_size / out_size
+
+    if resampling == 'nearest':
+        # PIL maps each output pixel centre to the source pixel containing it, stepping
+        # the centre by repeated addition (the rounding decides ties on exact edges)
+        steps = np.full(out_size, scale)
+        steps[0] = 0.5 * scale
+        indices = np.clip(np.floor(np.cumsum(steps)).astype(np.int64), 0, in_size - 1)
+        return indices[:, None], np.ones((out_size, 1))
+
+    support, kernel = RESAMPLE_KERNELS[resampling]
+    filter_scale = max(scale, 1.0)
+    support *= filter_scale
+    taps = int(math.ceil(support)) * 2 + 1
+
+    centers = (np.arange(out_size) + 0.5) * scale
+    first = np.maximum(np.trunc(centers - support + 0.5), 0).astype(np.int64)
+    last = np.minimum(np.trunc(centers + support + 0.5), in_size).astype(np.int64)
+    indices = first[:, None] + np.arange(taps)[None, :]
+    weights = kernel((indices - centers[:, None] + 0.5) / filter_scale) * (indices < last[:, None])
+    totals = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, totals, out=np.zeros_like(weights), where=totals != 0)
+    return np.minimum(indices, in_size - 1), weights
+
+def resample_span(in_size, out_size, resampling, start, end):
+    """Source pixels [first, last) that output pixels [start, end) of a resize read from."""
+    indices, weights = resample_coefficients(in_size, out_size, resampling)
+    used = indices[start:end][weights[start:end] != 0]
+    if used.size == 0:
+        return 0, 0
+    return int(used.min()), int(used.max()) + 1
+
+def _resample_axis(x, dim, indices, weights):
+    """Weighted sum of gathered source rows/columns along dim, one tap at a time."""
+    out = None
+    shape = [1] * x.dim()
+    shape[dim] = -1
+    for tap in range(indices.shape[1]):
+        if not weights[:, tap].any():
+            continue
+        index = torch.as_tensor(indices[:, tap], device=x.device)
+        weight = torch.as_tensor(weights[:, tap], dtype=x.dtype, device=x.device).view(shape)
+        term = x.index_select(dim, index).mul_(weight)
+        out = term if out is None else out.add_(term)
+    return out
+
+def resize_tensor(images, width, height, resampling, crop=None, source=None):
+    """
+    Resize a [B, H, W, C] image tensor of any precision to width x height on its own
+    device, sampling like PIL's Image.resize (bicubic with a = -0.5, PIL's nearest rule,
+    overshooting filters clipped after each pass).
+    Returns float32.
+
+    crop = (left, top, right, bottom) returns only that region of the resized image,
+    reading only the source pixels under it; the result equals resizing and cropping.
+    source = (x, y, full_width, full_height) says that images is the window at (x, y)
+    of a larger full_width x full_height source, e.g. one cut with resample_span.
+    """
+    x0, y0, source_width, source_height = source if source is not None else (0, 0, images.shape[2], images.shape[1])
+    left, top, right, bottom = crop if crop is not None else (0, 0, width, height)
+
+    if crop is None and source is None and resampling == 'bilinear':
+        # torch's antialiased bilinear is PIL's algorithm
+        x = F.interpolate(to_float(images).movedim(-1, 1), size=(height, width), mode='bilinear', align_corners=False, antialias=True)
+        return x.movedim(1, -1)
+
+    rows, row_weights = resample_coefficients(source_height, height, resampling)
+    columns, column_weights = resample_coefficients(source_width, width, resampling)
+    rows, row_weights = rows[top:bottom] - y0, row_weights[top:bottom]
+    columns, column_weights = columns[left:right] - x0, column_weights[left:right]
+
+    # Cut the source down to the pixels the filters reach before doing any work
+    row0, row1 = int(rows[row_weights != 0].min()), int(rows[row_weights != 0].max()) + 1
+    column0, column1 = int(columns[column_weights != 0].min()), int(columns[column_weights != 0].max()) + 1
+    if row0 < 0 or column0 < 0 or row1 > images.shape[1] or column1 > images.shape[2]:
+        raise ValueError("resize_tensor: the source window does not cover the requested crop")
+    x = to_float(images[:, row0:row1, column0:column1, :])
+    # Taps without weight may point outside the window, keep them in range
+    rows = np.clip(rows - row0, 0, row1 - row0 - 1)
+    columns = np.clip(columns - column0, 0, column1 - column0 - 1)
+
+    # Horizontal pass first, like PIL. Bicubic and lanczos overshoot, PIL clips them after each pass
+    x = _resample_axis(x, 2, columns, column_weights)
+    if resampling in ('bicubic', 'lanczos'):
+        x = x.clamp_(0.0, 1.0)
+    x = _resample_axis(x, 1, rows, row_weights)
+    if resampling in ('bicubic', 'lanczos'):
+        x = x.clamp_(0.0, 1.0)
+    return x
+
+def to_rgb(images):
+    """Return a [B, H, W, 3] view of a [B, H, W, C] tensor (drops alpha, expands grayscale)."""
+    channels = images.shape[-1]
+    if channels == 3:
+        return images
+    if channels == 1:
+        return images.expand(-1, -1, -1, 3)
+    return images[..., :3]
+
+def paste_tensor(canvas, images, x, y):
+    """
+    Paste [B, h, w, C] images into a [B, H, W, C] canvas in place at (x, y),
+    clipping whatever falls outside the canvas (like PIL's paste).
+    """
+    canvas_h, canvas_w = canvas.shape[1], canvas.shape[2]
+    img_h, img_w = images.shape[1], images.shape[2]
+
+    dst_x0, dst_y0 = max(0, x), max(0, y)
+    dst_x1, dst_y1 = min(canvas_w, x + img_w), min(canvas_h, y + img_h)
+    if dst_x1 <= dst_x0 or dst_y1 <= dst_y0:
+        return canvas
+
+    src_x0, src_y0 = dst_x0 - x, dst_y0 - y
+    canvas[:, dst_y0:dst_y1, dst_x0:dst_x1, :] = \
+        images[:, src_y0:src_y0 + (dst_y1 - dst_y0), src_x0:src_x0 + (dst_x1 - dst_x0), :]
+    return canvas
+
+def percentile(values, percents, dim=0):
+    """
+    Linear-interpolated percentiles (same as numpy.percentile's default) along dim,
+    computed on the tensor's device without a host round-trip.
+    Returns one tensor per requested percent.
+    """
+    if on_host(values):
+        # CPU tensors share memory with numpy, which finds all percentiles of a row in one
+        # partition. Row by row keeps the partition copy small.
+        rows = np.moveaxis(values.numpy(), dim, -1)
+        results = np.empty((len(percents),) + rows.shape[:-1], dtype=np.float64)
+        for index in np.ndindex(*rows.shape[:-1]):
+            results[(slice(None),) + index] = np.percentile(rows[index], percents)
+        return [torch.from_numpy(result).to(values.dtype) for result in results]
+
+    # Elsewhere a single sort serves every percentile
+    ordered = torch.sort(values, dim=dim).values
+    n = values.shape[dim]
+    results = []
+    for percent in percents:
+        position = percent / 100.0 * (n - 1)
+        lower = int(math.floor(position))
+        upper = min(lower + 1, n - 1)
+        fraction = position - lower
+
+        low_value = ordered.select(dim, lower)
+        if fraction > 0 and upper != lower:
+            low_value = low_value + (ordered.select(dim, upper) - low_value) * fraction
+        results.append(low_value)
+    return results
+
+def chunk_budget_bytes():
+    """Working memory budget for one chunk, from NIMBUS_CHUNK_BUDGET_MB."""
+    try:
+        budget_mb = float(os.environ.get("NIMBUS_CHUNK_BUDGET_MB", DEFAULT_CHUNK_BUDGET_MB))
+    except ValueError:
+        budget_mb = DEFAULT_CHUNK_BUDGET_MB
+    return int(budget_mb * 1024 * 1024)
+
+def process_in_chunks(images, out_shape, precision, fn, frame_bytes, budget_bytes=None):
+    """
+    Run fn over the batch in chunks and write each result straight into one
+    preallocated output, so peak memory stays close to input + output + one chunk.
+
+    fn takes a [n, H, W, C] slice of images and returns the processed [n, ...] frames.
+    frame_bytes is the working memory one frame needs inside fn; the chunk size is
+    the budget (NIMBUS_CHUNK_BUDGET_MB by default) divided by it.
+    """
+    if budget_bytes is None:
+        budget_bytes = chunk_budget_bytes()
+    step = max(1, int(budget_bytes // max(1, frame_bytes)))
+
+    out = torch.empty(out_shape, dtype=PRECISIONS[precision], device=images.device)
+    for start in range(0, images.shape[0], step):
+        end = min(start + step, images.shape[0])
+        out[start:end] = to_precision(fn(images[start:end]), precision)
+    return out
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+def worker_count():
+    """Number of threads for per-frame work, from NIMBUS_THREADS (1 disables threading)."""
+    try:
+        return max(1, int(os.environ["NIMBUS_THREADS"]))
+    except (KeyError, ValueError):
+        return max(1, min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1))
+
+def get_executor():
+    """Shared, bounded thread pool. Recreated if the configured worker count changes."""
+    global _executor, _executor_workers
+    workers = worker_count()
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nimbus")
+            _executor_workers = workers
+        return _executor
+
+def map_ordered(fn, items):
+    """
+    Apply fn to every item on the shared thread pool and return the results in order.
+    PIL's resampling and numpy conversions release the GIL, so frames run concurrently.
+    """
+    items = list(items)
+    if len(items) <= 1 or worker_count() <= 1:
+        return [fn(item) for item in items]
+    return list(get_executor().map(fn, items))